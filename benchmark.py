@@ -0,0 +1,246 @@
+# Times gen_packets.py, find_sheet_issues.py and old_code.assign on synthetic sheets of increasing size, and measures how
+# much memory gen_packets.write_tex needs on top of the loaded sheet.
+# Usage: python benchmark.py [--sizes 1000 10000 100000] [--results benchmark_results.jsonl]
+# Each run appends one JSON line per sheet size to the results file, tagged with the current git commit, so runs can be
+# compared across commits. make_sheet can also be used on its own to get a realistic sheet for testing.
+
+import argparse
+import datetime
+import io
+import json
+import os
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import find_sheet_issues
+import gen_packets as gp
+from pipeline_stats import Stats
+
+CATEGORIES = ["Math", "Biology", "Chemistry", "Physics", "Earth and Space", "Energy"]
+SUBCATEGORIES = {
+    "Math": ["Algebra", "Geometry", "Calculus", "Number Theory"],
+    "Biology": ["Molecular", "Ecology", "Anatomy", "Genetics"],
+    "Chemistry": ["Organic", "Inorganic", "Physical", "Analytical"],
+    "Physics": ["Mechanics", "E&M", "Thermo", "Modern"],
+    "Earth and Space": ["Geology", "Astronomy", "Meteorology", "Oceanography"],
+    "Energy": ["Nuclear", "Solar", "Batteries", "Grid"],
+}
+WORDS = (
+    "energy mass charge cell protein orbit planet acid base field wave star rock enzyme "
+    "current voltage reaction gene mantle comet electron proton photon lattice integral"
+).split()
+
+# Returns a DataFrame of num_rows questions with the same columns as our template. Every round gets (roughly) the same
+# number of toss-ups and bonuses of each category; bodies are a mix of short answer, multiple choice and multiple-item
+# questions with some inline LaTeX.
+def make_sheet(num_rows, seed=0, num_rounds=gp.NUM_ROUNDS):
+    rng = np.random.default_rng(seed)
+    ix = np.arange(num_rows)
+    categories = np.array(CATEGORIES)[ix % len(CATEGORIES)]
+    types = np.where((ix // len(CATEGORIES)) % 2 == 0, gp.TOSSUP, gp.BONUS)
+    rounds = (ix // (2 * len(CATEGORIES))) % num_rounds + 1
+    kind = rng.choice(["sa", "mc", "items"], size=num_rows, p=[0.45, 0.45, 0.1])
+    words = np.array(WORDS)[rng.integers(len(WORDS), size=(num_rows, 12))]
+    answers = rng.choice(list("WXYZ"), size=num_rows)
+
+    rows = {c: [] for c in ["Question", "W", "X", "Y", "Z", "Answer"]}
+    for k, w, answer in zip(kind, words, answers):
+        stem = " ".join(w[:8])
+        if k == "mc":
+            rows["Question"].append(f"Which of the following best describes the {stem} of $x^2$?")
+            for i, letter in enumerate("WXYZ"):
+                rows[letter].append(f"{w[8 + i].capitalize()} {i + 1}")
+            rows["Answer"].append(answer)
+        else:
+            if k == "items":
+                rows["Question"].append(
+                    f"Identify all of the following that are true of the {stem}: "
+                    f"1) {w[8]}; 2) {w[9]}; 3) {w[10]}"
+                )
+                rows["Answer"].append("1 AND 3")
+            else:
+                rows["Question"].append(f"What is the {stem}, in units of $\\text{{m}}^2$?")
+                rows["Answer"].append(w[11].upper())
+            for letter in "WXYZ":
+                rows[letter].append(None)
+
+    sheet = pd.DataFrame(
+        {
+            gp.ROUND_NUM: rounds,
+            gp.TYPE: types,
+            gp.FORMAT: np.where(kind == "mc", gp.MC, gp.SA),
+            gp.CATEGORY: categories,
+            gp.SUBCAT: [
+                SUBCATEGORIES[c][j] for c, j in zip(categories, rng.integers(4, size=num_rows))
+            ],
+            gp.BODY: rows["Question"],
+            gp.W: rows["W"],
+            gp.X: rows["X"],
+            gp.Y: rows["Y"],
+            gp.Z: rows["Z"],
+            gp.ANSWER: rows["Answer"],
+            gp.ACCEPT: np.where(rng.random(num_rows) < 0.2, "ALTERNATE ANSWER", None),
+            gp.DO_NOT_ACCEPT: np.where(rng.random(num_rows) < 0.1, "WRONG ANSWER", None),
+            "Writer": rng.choice(["Writer A", "Writer B", "Writer C"], size=num_rows),
+            "Source": "Synthetic",
+            "Date": "2025-01-01",
+            "Division (Approx)": rng.choice(["HS", "MS"], size=num_rows),
+            "Difficulty": rng.integers(1, 6, size=num_rows),
+            "Quality": rng.integers(1, 6, size=num_rows),
+        }
+    )
+    return sheet.iloc[rng.permutation(num_rows)].reset_index(drop=True)
+
+
+# The columns old_code.get_data expects: "Toss up/Bonus" for the type, "Type" for the format, and "Pairing" for questions
+# that have to be used together (here, about 5% of toss-ups get paired with a bonus of the same category).
+# Difficulties are floats, as they are in real sheets with blank cells, since assign averages them in place.
+def make_legacy_sheet(sheet):
+    legacy = sheet.rename(columns={gp.TYPE: "Toss up/Bonus", gp.FORMAT: "Type"})
+    legacy["Toss up/Bonus"] = np.where(legacy["Toss up/Bonus"] == gp.TOSSUP, "Toss up", "Bonus")
+    legacy["Difficulty"] = legacy["Difficulty"].astype(float)
+    pairing = np.full(len(legacy), None, dtype=object)
+    for c in CATEGORIES:
+        tossups = np.flatnonzero((legacy.Category == c) & (legacy["Toss up/Bonus"] == "Toss up"))
+        bonuses = np.flatnonzero((legacy.Category == c) & (legacy["Toss up/Bonus"] == "Bonus"))
+        num_pairs = min(len(tossups), len(bonuses)) // 20
+        for p, (t, b) in enumerate(zip(tossups[:num_pairs], bonuses[:num_pairs])):
+            pairing[t] = pairing[b] = f"{c} {p}"
+    legacy["Pairing"] = pairing
+    return legacy
+
+
+class Timer:
+    def __init__(self):
+        self.times = {}
+
+    def __call__(self, stage, fn, *args, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        self.times[stage] = self.times.get(stage, 0.0) + time.perf_counter() - start
+        return result
+
+
+def bench_gen_packets(path, directory, engine):
+    timer = Timer()
+    sheet = timer("load", gp.read_sheet, path, engine)
+    template = gp.load_template()
+    rounds = timer("split", lambda: gp.split_rounds(gp.parse_sheet(sheet)))
+    for round_num, round_qs in rounds.items():
+        buckets = timer("bucket", gp.bucket_types, round_qs)
+        paired = timer("pair", gp.pair_buckets, *buckets)
+        question_pairs = timer("order", gp.order_round, paired, gp.round_rng(round_num))
+        tex = io.StringIO()
+        timer(
+            "render",
+            gp.write_template,
+            tex,
+            template,
+            round_num,
+            lambda f: gp.write_question_tex(f, question_pairs),
+        )
+        with open(gp.round_path(directory, round_num), "w") as outf:
+            timer("write", outf.write, tex.getvalue())
+    return timer.times
+
+
+# Peak memory (in bytes) allocated by a build the way the command line does it: load_sheet (without the sheet cache, so
+# that nothing is left in it) and write_tex, the sheet included. This is a separate run from bench_gen_packets, since
+# tracing allocations slows everything down.
+def peak_gen_packets(path, directory, engine):
+    args = gp.parse_args([path, "--output", directory, "--engine", engine, "--no-cache", "--force"])
+    tracemalloc.start()
+    try:
+        sheet = gp.load_sheet(args, Stats())
+        gp.write_tex(sheet, directory, force=True)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_find_sheet_issues(path):
+    timer = Timer()
+    find_sheet_issues.import_pandas()
+    sheet = timer("load", pd.read_csv, path)
+    timer("check", find_sheet_issues.make_error_file, sheet, io.StringIO())
+    with open(path, newline="") as csv_file:
+        timer("stream", find_sheet_issues.stream_error_file, csv_file, io.StringIO())
+    return timer.times
+
+
+def bench_assign(path, legacy_sheet):
+    import old_code
+
+    timer = Timer()
+    legacy_sheet.to_csv(path, index=False)
+    qs_list = timer("load", old_code.get_data, path)
+    for qs in qs_list:
+        timer("assign", old_code.assign, qs)
+    return timer.times
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(num_rows, seed=0):
+    result = {
+        "rows": num_rows,
+        "commit": git_commit(),
+        "time": datetime.datetime.now().isoformat(timespec="seconds"),
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sheet.csv")
+        start = time.perf_counter()
+        sheet = make_sheet(num_rows, seed)
+        sheet.to_csv(path, index=False)
+        result["generate"] = time.perf_counter() - start
+        peaks = {}
+        for engine in ("pandas", "stdlib"):
+            directory = os.path.join(tmp, engine)
+            os.makedirs(directory)
+            result[f"gen_packets_{engine}"] = bench_gen_packets(path, directory, engine)
+            peaks[f"gen_packets_{engine}"] = peak_gen_packets(path, directory, engine)
+        result["find_sheet_issues"] = bench_find_sheet_issues(path)
+        legacy_path = os.path.join(tmp, "legacy.csv")
+        result["old_code"] = bench_assign(legacy_path, make_legacy_sheet(sheet))
+        result["peak_memory"] = peaks
+    return result
+
+
+def format_result(result):
+    lines = [f"{result['rows']} rows (sheet generated in {result['generate']:.2f}s)"]
+    for key, times in result.items():
+        if key == "peak_memory":
+            peaks = ", ".join(f"{name} {peak / 2**20:.1f} MiB" for name, peak in times.items())
+            lines.append(f"  peak memory: {peaks}")
+        elif isinstance(times, dict):
+            stages = ", ".join(f"{stage} {t:.3f}s" for stage, t in times.items())
+            lines.append(f"  {key}: {sum(times.values()):.3f}s ({stages})")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the packet scripts on synthetic sheets")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--results", default="benchmark_results.jsonl")
+    args = parser.parse_args()
+    for num_rows in args.sizes:
+        result = run(num_rows, args.seed)
+        print(format_result(result))
+        with open(args.results, "a") as outf:
+            outf.write(json.dumps(result) + "\n")
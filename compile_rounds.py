@@ -0,0 +1,153 @@
+# Compiles the .tex files written by gen_packets.py to .pdf with a local TeX install, several rounds at a time.
+# Usage: python compile_rounds.py [directory] [--compiler COMMAND] [--workers N] [--force]
+# COMMAND is run from inside the directory, with {tex} replaced by the file name, e.g. "lualatex -interaction=nonstopmode {tex}".
+# Any command works (e.g. "true" when testing); only .tex files that changed since their last successful compile are rerun.
+
+import argparse
+import glob
+import hashlib
+import os
+import re
+import shlex
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import manifests
+
+DEFAULT_COMPILER = "pdflatex -interaction=nonstopmode -halt-on-error {tex}"
+TIMEOUT = 300  # Seconds per round
+
+# Records a hash of each .tex file that compiled successfully
+MANIFEST = ".pdf-manifest.json"
+
+COMPILED, SKIPPED, FAILED = "compiled", "skipped", "failed"
+
+
+class CompileResult:
+    def __init__(self, tex, status, seconds=0.0, log=None, error=None):
+        self.tex = tex
+        self.status = status
+        self.seconds = seconds
+        self.log = log  # Path to the captured compiler output
+        self.error = error  # First LaTeX error, if any
+
+    def __str__(self):
+        if self.status == FAILED:
+            return f"{self.tex}: failed after {self.seconds:.1f}s: {self.error} (see {self.log})"
+        if self.status == SKIPPED:
+            return f"{self.tex}: unchanged, skipped"
+        return f"{self.tex}: compiled in {self.seconds:.1f}s"
+
+
+def file_hash(path):
+    with open(path, "rb") as inf:
+        return hashlib.sha256(inf.read()).hexdigest()
+
+
+# LaTeX errors start with "! "; the line after them that starts with "l." gives the line number in the .tex file
+def first_latex_error(output):
+    lines = output.splitlines()
+    for i, line in enumerate(lines):
+        if line.startswith("! "):
+            context = next((l for l in lines[i + 1 : i + 10] if l.startswith("l.")), None)
+            return f"{line} {context}" if context else line
+    return None
+
+
+def compile_command(compiler, tex):
+    args = shlex.split(compiler)
+    if "{tex}" not in compiler:
+        args.append("{tex}")
+    return [arg.replace("{tex}", tex) for arg in args]
+
+
+# Compiles a single .tex file in its own directory, keeping the compiler output next to it in <name>.compile.log
+def compile_tex(path, compiler=DEFAULT_COMPILER, timeout=TIMEOUT):
+    directory, tex = os.path.split(path)
+    log = os.path.splitext(path)[0] + ".compile.log"
+    start = time.perf_counter()
+    try:
+        proc = subprocess.run(
+            compile_command(compiler, tex),
+            cwd=directory or ".",
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            timeout=timeout,
+        )
+        output = proc.stdout.decode(errors="replace")
+        returncode = proc.returncode
+    except subprocess.TimeoutExpired as e:
+        output = (e.stdout or b"").decode(errors="replace") + f"\nTimed out after {timeout}s\n"
+        returncode = None
+    except OSError as e:
+        output = f"Could not run {compiler!r}: {e}\n"
+        returncode = None
+    seconds = time.perf_counter() - start
+    with open(log, "w") as outf:
+        outf.write(output)
+    if returncode == 0:
+        return CompileResult(tex, COMPILED, seconds, log)
+    error = first_latex_error(output)
+    if error is None:
+        last_line = (output.strip().splitlines() or ["no output"])[-1]
+        # No return code: the compiler couldn't be started or timed out, which the last line says
+        error = last_line if returncode is None else f"exit status {returncode}: {last_line}"
+    return CompileResult(tex, FAILED, seconds, log, error)
+
+
+ROUND_FILE = re.compile(r"Round (\d+)\.tex")
+
+
+# Sorts "Round 2.tex" before "Round 10.tex"; files with anything else after "Round " go last, by name
+def round_order(path):
+    name = os.path.basename(path)
+    match = ROUND_FILE.fullmatch(name)
+    return (0, int(match.group(1)), name) if match else (1, 0, name)
+
+
+# Compiles every "Round *.tex" in directory, at most workers at a time (None: one per CPU).
+# Files whose hash matches the manifest and that have a .pdf are skipped unless force is set.
+# Returns a list of CompileResults, one per round, in order of round number.
+def compile_rounds(directory, compiler=DEFAULT_COMPILER, workers=None, force=False, timeout=TIMEOUT):
+    paths = sorted(glob.glob(os.path.join(directory, "Round *.tex")), key=round_order)
+    manifest = {} if force else manifests.read_manifest(directory, MANIFEST)
+    hashes = {os.path.basename(p): file_hash(p) for p in paths}
+    results, stale = {}, []
+    for path in paths:
+        tex = os.path.basename(path)
+        pdf = os.path.splitext(path)[0] + ".pdf"
+        if manifest.get(tex) == hashes[tex] and os.path.exists(pdf):
+            results[tex] = CompileResult(tex, SKIPPED)
+        else:
+            stale.append(path)
+    # ThreadPoolExecutor's own default is min(32, CPUs + 4), more pdflatex processes than there are CPUs
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        for result in pool.map(lambda p: compile_tex(p, compiler, timeout), stale):
+            results[result.tex] = result
+    # Only remember files that compiled, so failures are retried next time
+    manifests.write_manifest(
+        directory,
+        MANIFEST,
+        {
+            tex: hashes[tex]
+            for tex, result in results.items()
+            if result.status != FAILED
+        },
+    )
+    return [results[os.path.basename(p)] for p in paths]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile generated rounds to PDF")
+    parser.add_argument("directory", nargs="?", default="rounds-tex")
+    parser.add_argument("--compiler", default=DEFAULT_COMPILER)
+    parser.add_argument("--workers", type=int, default=None, help="rounds to compile at once (default: one per CPU)")
+    parser.add_argument("--force", action="store_true", help="recompile every round")
+    args = parser.parse_args()
+    results = compile_rounds(args.directory, args.compiler, args.workers, args.force)
+    for result in results:
+        print(result)
+    sys.exit(1 if any(r.status == FAILED for r in results) else 0)
@@ -1,7 +1,30 @@
+import argparse
+import csv
+import itertools
+import math
 import os
+import re
 import sys
-import numpy as np
-import pandas as pd
+import zlib
+
+import latex_lint
+from pipeline_stats import Stats, profiled
+import sheet_cache
+from sheet_format import LATEX_COLUMNS, NA_VALUES, clean_cells
+
+# Only --stream runs without these; import_pandas (or import_numpy, for the duplicate index alone) sets them
+np = pd = None
+
+
+def import_pandas():
+    global np, pd
+    import numpy as np
+    import pandas as pd
+
+
+def import_numpy():
+    global np
+    import numpy as np
 
 # Column headers in the spreadsheet
 ROUND = "Round"  # Round number
@@ -28,7 +51,6 @@ TOSSUP, BONUS = "Toss-up", "Bonus"
 CATEGORIES = ["Math", "Biology", "Chemistry", "Physics", "Earth and Space", "Energy"]
 MULTIPLE_CHOICE, SHORT_ANSWER = "Multiple Choice", "Short Answer"
 
-
 class FormatError(Exception):
     pass
 
@@ -38,99 +60,427 @@ class FormatWarning(Exception):
 
 
 def is_nan(val):
-    return val == "nan" if type(val) == str else np.isnan(val)
-
-
-def check_type(row):
-    if row[TYPE] not in [TOSSUP, BONUS]:
-        raise FormatError("Question type invalid")
-
-
-def check_format(row):
-    if row[FORMAT] not in [MULTIPLE_CHOICE, SHORT_ANSWER]:
-        raise FormatError("Question format invalid")
-    if row[FORMAT] == MULTIPLE_CHOICE and any(
-        is_nan(row[c]) for c in ANSWER_CHOICE_LETTERS
-    ):  # If any answer choice is missing
-        raise FormatError("Multiple choice question has missing answer choices")
-    if row[FORMAT] == SHORT_ANSWER and not all(
-        is_nan(row[c]) for c in ANSWER_CHOICE_LETTERS
-    ):  # Not all cells empty
-        raise FormatError("Short answer question has extraneous answer choices")
-
-
-def check_category(row):
-    if row[CATEGORY] not in CATEGORIES:
-        raise FormatError("Question category invalid")
-
-
-def check_question_single_line(row):
-    if "\n" in row[QUESTION]:
-        raise FormatError("Question spans multiple lines")
-
-
-def check_mc_wording(row):
-    if (
-        row[FORMAT] == MULTIPLE_CHOICE
-        and "which of the following" not in row[QUESTION].lower()
-    ):
-        raise FormatWarning(
-            "Multiple choice question does not contain the phrase 'which of the following'"
+    return val == "nan" if type(val) == str else math.isnan(val)
+
+
+# The Question cell as text: cells that aren't strings (empty cells, numbers) become "", as in text_column
+def question_text(row):
+    question = row[QUESTION]
+    return question if type(question) == str else ""
+
+
+def row_missing_choices(row):
+    return [is_nan(row[c]) for c in ANSWER_CHOICE_LETTERS]
+
+
+# The column-wise counterparts of question_text and row_missing_choices, for when the whole sheet is loaded with pandas
+def text_column(sheet, col):
+    # Cells that aren't strings (empty cells, numbers) become "", which passes every text rule
+    values = sheet[col]
+    if pd.api.types.is_string_dtype(values) and values.dtype != object:
+        return values.fillna("")
+    if values.dtype != object:
+        return pd.Series("", index=sheet.index)
+    return values.where(values.map(type) == str, "").astype(str)
+
+
+def missing_choices(sheet):
+    return sheet[ANSWER_CHOICE_LETTERS].isna()
+
+
+def question_lower(sheet):
+    return text_column(sheet, QUESTION).str.lower()
+
+
+# Each rule is (exception class, message, row predicate, column predicate). The row predicate takes a row (a dictionary
+# keyed by column name, with empty cells as NaN) and is used by check_row; the column predicate takes the whole sheet and
+# returns a boolean Series that is True on the rows with the issue, and is used by make_error_file. Both report every rule
+# a row breaks, in the order of this list.
+rules = [
+    (
+        FormatError,
+        "Question type invalid",
+        lambda r: r[TYPE] not in [TOSSUP, BONUS],
+        lambda s: ~s[TYPE].isin([TOSSUP, BONUS]),
+    ),
+    (
+        FormatError,
+        "Question format invalid",
+        lambda r: r[FORMAT] not in [MULTIPLE_CHOICE, SHORT_ANSWER],
+        lambda s: ~s[FORMAT].isin([MULTIPLE_CHOICE, SHORT_ANSWER]),
+    ),
+    (
+        FormatError,
+        "Multiple choice question has missing answer choices",
+        lambda r: r[FORMAT] == MULTIPLE_CHOICE and any(row_missing_choices(r)),
+        lambda s: (s[FORMAT] == MULTIPLE_CHOICE) & missing_choices(s).any(axis=1),
+    ),
+    (
+        FormatError,
+        "Short answer question has extraneous answer choices",
+        lambda r: r[FORMAT] == SHORT_ANSWER and not all(row_missing_choices(r)),
+        lambda s: (s[FORMAT] == SHORT_ANSWER) & ~missing_choices(s).all(axis=1),
+    ),
+    (
+        FormatError,
+        "Question category invalid",
+        lambda r: r[CATEGORY] not in CATEGORIES,
+        lambda s: ~s[CATEGORY].isin(CATEGORIES),
+    ),
+    (
+        FormatError,
+        "Question spans multiple lines",
+        lambda r: "\n" in question_text(r),
+        lambda s: text_column(s, QUESTION).str.contains("\n", regex=False),
+    ),
+    (
+        FormatWarning,
+        "Multiple choice question does not contain the phrase 'which of the following'",
+        lambda r: r[FORMAT] == MULTIPLE_CHOICE and "which of the following" not in question_text(r).lower(),
+        lambda s: (s[FORMAT] == MULTIPLE_CHOICE)
+        & ~question_lower(s).str.contains("which of the following", regex=False),
+    ),
+    (
+        FormatWarning,
+        "Question wording contains the word false",
+        lambda r: "false" in question_text(r).lower(),
+        lambda s: question_lower(s).str.contains("false", regex=False),
+    ),
+    (
+        FormatWarning,
+        "Question wording contains the word cannot",
+        lambda r: "cannot" in question_text(r).lower(),
+        lambda s: question_lower(s).str.contains("cannot", regex=False),
+    ),
+    (
+        FormatWarning,
+        "Question does not capitalize the word 'not'",
+        lambda r: "not" in question_text(r).lower() and "NOT" not in question_text(r),
+        lambda s: question_lower(s).str.contains("not", regex=False)
+        & ~text_column(s, QUESTION).str.contains("NOT", regex=False),
+    ),
+]
+
+
+def broken_latex_message(col, problem):
+    return f"Broken LaTeX in {col}: {problem}"
+
+
+def unknown_commands_message(col, unknown):
+    return f"Unknown LaTeX command in {col} (not in round_template.tex): {', '.join(unknown)}"
+
+
+# Row-wise version of latex_issues: lexes each of the row's cells once, and returns a list of (exception class, message)
+# for its broken LaTeX and unknown commands. commands comes from latex_lint.known_commands, worked out once per run.
+def row_latex_issues(row, commands):
+    issues = []
+    for col in LATEX_COLUMNS:
+        problem, unknown = latex_lint.check_latex(row.get(col), commands)
+        if problem is not None:
+            issues.append((FormatError, broken_latex_message(col, problem)))
+        if unknown:
+            issues.append((FormatWarning, unknown_commands_message(col, unknown)))
+    return issues
+
+
+# Runs latex_lint over every cell in LATEX_COLUMNS. Returns a list of (position, exception class, message), in order of
+# column, with the broken LaTeX in a cell before its unknown commands.
+def latex_issues(sheet):
+    commands = latex_lint.known_commands()
+    issues = []
+    for col in LATEX_COLUMNS:
+        if col not in sheet:
+            continue
+        for pos, problem, unknown in latex_lint.check_cells(sheet[col].tolist(), commands):
+            if problem is not None:
+                issues.append((pos, FormatError, broken_latex_message(col, problem)))
+            if unknown:
+                issues.append((pos, FormatWarning, unknown_commands_message(col, unknown)))
+    return issues
+
+
+# Near-duplicate questions. Each question (with its answer) is reduced to a MinHash signature of the 3-grams of its words,
+# leaving out common words so that boilerplate like "which of the following" doesn't make unrelated questions look alike.
+# Questions whose signatures agree on a whole band of DUP_HASHES // DUP_BANDS values are compared, and reported if at least
+# DUP_SIMILARITY of their signatures agree (which estimates the overlap of their 3-grams). This takes close to linear time
+# in the number of questions, and the signatures can be saved to an index file to check later sheets against.
+DUP_SHINGLE = 3  # Words per n-gram
+DUP_HASHES = 64
+DUP_BANDS = 16
+DUP_SIMILARITY = 0.7
+DUP_SEED = 2025
+DUP_MAX_COMPARE = 50  # Questions sharing a band are compared with at most this many of the ones before them
+DUP_CHUNK = 4096  # Questions hashed at a time
+DUP_WORD = re.compile(r"[a-z0-9]+")
+DUP_STOPWORDS = frozenset(
+    "a about all an and are as at be by do does following for from has have in is it its of on or "
+    "that the these this those to was were what which who with".split()
+)
+
+
+def duplicate_text(question, answer):
+    return " ".join(t for t in (question, answer) if type(t) == str)
+
+
+# Hashes of the word 3-grams of each text (or of all its words, for texts with fewer). Each distinct word is hashed once,
+# and the 3-gram hashes are combined from those with numpy. Returns (owners, values): the text each hash came from, and
+# the hash.
+def shingle_hashes(texts):
+    words = [[w for w in DUP_WORD.findall(t.lower()) if w not in DUP_STOPWORDS] for t in texts]
+    lengths = np.array([len(w) for w in words], dtype=np.int64)
+    all_words = list(itertools.chain.from_iterable(words))
+    vocab = {w: i for i, w in enumerate(dict.fromkeys(all_words))}
+    ids = np.fromiter(map(vocab.__getitem__, all_words), dtype=np.int64, count=len(all_words))
+    word_hashes = np.array([zlib.crc32(w.encode()) for w in vocab], dtype=np.uint64)[ids]
+    owners = np.repeat(np.arange(len(texts)), lengths)
+    ends = np.cumsum(lengths)[owners]  # Where each word's text ends
+    position = np.arange(len(ids))
+    gram_length = np.minimum(ends - position, DUP_SHINGLE)
+    is_start = position == ends - lengths[owners]
+    # A gram starts at every word with DUP_SHINGLE words left in its text, or at the first word of a shorter text
+    starts = (gram_length == DUP_SHINGLE) | (is_start & (lengths[owners] < DUP_SHINGLE))
+    padded = np.concatenate([word_hashes, np.zeros(DUP_SHINGLE, dtype=np.uint64)])
+    values = padded[: len(ids)].copy()
+    for r in range(1, DUP_SHINGLE):
+        following = np.where(r < gram_length, padded[r : r + len(ids)], np.uint64(0))
+        values = values * np.uint64(0x100000001B3) + following  # Wraps around
+    return owners[starts], values[starts]
+
+
+# Returns the MinHash signatures of texts (one row of DUP_HASHES values each), and which texts had any 3-grams left
+def minhash_signatures(texts):
+    # Each of the DUP_HASHES hash functions is (a * x + b) mod 2^64, shifted down to 32 bits
+    rng = np.random.default_rng(DUP_SEED)
+    a = rng.integers(0, 1 << 63, size=(DUP_HASHES, 1), dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rng.integers(0, 1 << 63, size=(DUP_HASHES, 1), dtype=np.uint64)
+    owners, values = shingle_hashes(texts)
+    counts = np.bincount(owners, minlength=len(texts))
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    signatures = np.zeros((len(texts), DUP_HASHES), dtype=np.uint32)
+    has_words = counts > 0
+    for lo in range(0, len(texts), DUP_CHUNK):
+        ids = lo + np.flatnonzero(has_words[lo : lo + DUP_CHUNK])
+        if len(ids) == 0:
+            continue
+        chunk = values[starts[ids[0]] : starts[ids[-1]] + counts[ids[-1]]]
+        permuted = (a * chunk + b) >> np.uint64(32)
+        signatures[ids] = np.minimum.reduceat(permuted, starts[ids] - starts[ids[0]], axis=1).T
+    return signatures, has_words
+
+
+def band_keys(signatures):
+    bands = signatures.astype(np.uint64).reshape(len(signatures), DUP_BANDS, -1)
+    keys = np.zeros((len(signatures), DUP_BANDS), dtype=np.uint64)
+    for r in range(bands.shape[2]):
+        keys = keys * np.uint64(1_000_003) ^ bands[:, :, r]  # Wraps around, which is fine for bucketing
+    return keys
+
+
+# Returns (i, j, similarity) for the pairs of signatures that are likely duplicates, where i < j and j >= first_new
+def similar_pairs(signatures, usable, first_new):
+    keys = band_keys(signatures)
+    ids = np.flatnonzero(usable)
+    found = [np.zeros(0, dtype=np.int64)]
+    for band in range(DUP_BANDS):
+        # Sorting by key keeps each bucket together, in order of id
+        order = ids[np.argsort(keys[ids, band], kind="stable")]
+        sorted_keys = keys[order, band]
+        position = np.arange(len(order))
+        bucket_start = np.maximum.accumulate(
+            np.where(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]], position, 0)
         )
-
-
-def check_question_negations(row):
-    bad_negations = ["false", "cannot"]
-    for w in bad_negations:
-        if w in row[QUESTION].lower():
-            raise FormatWarning(f"Question wording contains the word {w}")
-
-
-def check_capital_negations(row):
-    if "not" in row[QUESTION].lower() and "NOT" not in row[QUESTION]:
-        raise FormatWarning("Question does not capitalize the word 'not'")
-
-
-def satisfies_basic_latex(text):
-    """
-    Only checks for matching curly braces and an even number of dollar signs.
-    """
-    if type(text) != str:
-        return True
-    return text.count("{") == text.count("}") and text.count("$") % 2 == 0
-
-
-def check_basic_latex(row):
-    if not satisfies_basic_latex(row[QUESTION]):
-        raise FormatWarning("Question might contain improperly formatted LaTeX")
-    if row[FORMAT] == MULTIPLE_CHOICE and not all(
-        satisfies_basic_latex(row[c]) for c in ANSWER_CHOICE_LETTERS
-    ):
-        raise FormatWarning("Answer choices might contain improperly formatted LaTeX")
-
-
-checks_to_run = {
-    check_type,
-    check_format,
-    check_category,
-    check_question_single_line,
-    check_mc_wording,
-    check_question_negations,
-    check_capital_negations,
-    check_basic_latex,
-}
-
-
-def make_error_file(sheet, f):
-    for row in sheet.itertuples():
-        ix = row.Index
-        row = row._asdict()
-        for check in checks_to_run:
-            try:
-                check(row)
-            except (FormatError, FormatWarning) as e:
-                error_or_warning = "Error" if type(e) == FormatError else "Warning"
-                f.write(f"{error_or_warning} on row {ix+2}: {e}\n")
+        for d in range(1, DUP_MAX_COMPARE + 1):
+            later = position[d:][position[d:] - d >= bucket_start[d:]]
+            if len(later) == 0:
+                break
+            i, j = order[later - d], order[later]
+            found.append(i[j >= first_new] * len(signatures) + j[j >= first_new])
+    pairs = np.unique(np.concatenate(found))
+    i, j = pairs // len(signatures), pairs % len(signatures)
+    similarity = (signatures[i] == signatures[j]).mean(axis=1)
+    keep = similarity >= DUP_SIMILARITY
+    return list(zip(i[keep].tolist(), j[keep].tolist(), similarity[keep].tolist()))
+
+
+def round_label(val):
+    if type(val) == str:
+        return val if val not in NA_VALUES else ""
+    if val is None or math.isnan(val):
+        return ""
+    return str(int(val)) if float(val).is_integer() else str(val)
+
+
+# MinHash signatures of questions from earlier sheets, with the sheet (source), spreadsheet row and round of each
+class DuplicateIndex:
+    def __init__(self):
+        import_numpy()
+        self.signatures = np.zeros((0, DUP_HASHES), dtype=np.uint32)
+        self.sources, self.rows, self.rounds = [], [], []
+
+    @classmethod
+    def load(cls, path):
+        index = cls()
+        with np.load(path, allow_pickle=False) as data:
+            if data["params"].tolist() != [DUP_SHINGLE, DUP_HASHES, DUP_BANDS, DUP_SEED]:
+                raise ValueError(f"{path} was made with different duplicate check settings")
+            index.signatures = data["signatures"]
+            index.sources = data["sources"].tolist()
+            index.rows = data["rows"].tolist()
+            index.rounds = data["rounds"].tolist()
+        return index
+
+    def save(self, path):
+        with open(path, "wb") as outf:  # np.savez would add .npz to a path
+            np.savez_compressed(
+                outf,
+                params=np.array([DUP_SHINGLE, DUP_HASHES, DUP_BANDS, DUP_SEED]),
+                signatures=self.signatures,
+                sources=np.array(self.sources, dtype=str),
+                rows=np.array(self.rows, dtype=np.int64),
+                rounds=np.array(self.rounds, dtype=str),
+            )
+
+    # Finds the questions in texts that are likely duplicates of a question earlier in the sheet or in the index, then
+    # adds them to the index. rows and rounds are the spreadsheet row and round of each text. source identifies the sheet
+    # (its full path, or a label given with --dup-source): questions already in the index from exactly the same source
+    # are an older copy of this sheet, so they are replaced (and a note says so) rather than reported as duplicates.
+    # Returns a list of (position in texts, message), with the closest match for each duplicate.
+    def check(self, texts, rows, rounds, source):
+        keep = np.array([s != source for s in self.sources], dtype=bool)
+        if not keep.all():
+            print(
+                f"Replacing {np.count_nonzero(~keep)} questions from {source} in the duplicate index",
+                file=sys.stderr,
+            )
+        self.signatures = self.signatures[keep]
+        self.sources, self.rows, self.rounds = (
+            [v for v, k in zip(values, keep) if k] for values in (self.sources, self.rows, self.rounds)
+        )
+        first_new = len(self.sources)
+        signatures, has_words = minhash_signatures(texts)
+        self.signatures = np.concatenate([self.signatures, signatures])
+        self.sources += [source] * len(texts)
+        self.rows += list(rows)
+        self.rounds += [round_label(r) for r in rounds]
+        usable = np.concatenate([np.ones(first_new, dtype=bool), has_words])
+        best = {}
+        for i, j, similarity in similar_pairs(self.signatures, usable, first_new):
+            if j not in best or similarity > best[j][1]:
+                best[j] = (i, similarity)
+        issues = []
+        for j, (i, similarity) in sorted(best.items()):
+            where = f"row {self.rows[i]}" if self.sources[i] == source else f"{self.sources[i]} row {self.rows[i]}"
+            details = f"round {self.rounds[i]}, " if self.rounds[i] else ""
+            issues.append(
+                (j - first_new, f"Question may be a duplicate of {where} ({details}{similarity:.0%} similar)")
+            )
+        return issues
+
+
+# Runs every column check over the whole sheet, and writes what they find sorted by row (then in the order of rules,
+# then LaTeX issues, then likely duplicates, which are checked against dup_index if it is given and added to it as source)
+# If stats (a pipeline_stats.Stats) is given, the time spent on each rule and the number of issues are added to it.
+def make_error_file(sheet, f, stats=None, dup_index=None, source="sheet"):
+    import_pandas()
+    if stats is None:
+        stats = Stats()
+    if dup_index is None:
+        dup_index = DuplicateIndex()
+    stats.count("rows", len(sheet))
+    rows, orders = [], []
+    for order, (error, message, _, predicate) in enumerate(rules):
+        with stats.stage(message):
+            mask = predicate(sheet).fillna(False).to_numpy(dtype=bool)
+        found = sheet.index[mask].to_numpy()
+        stats.count("errors" if error == FormatError else "warnings", len(found))
+        rows.append(found)
+        orders.append(np.full(len(found), order))
+    with stats.stage("latex"):
+        extra = latex_issues(sheet)
+    for _, error, _ in extra:
+        stats.count("errors" if error == FormatError else "warnings")
+    with stats.stage("duplicates"):
+        duplicates = dup_index.check(
+            [
+                duplicate_text(q, a)
+                for q, a in zip(sheet[QUESTION].tolist(), sheet[ANSWER].tolist())
+            ],
+            (sheet.index + 2).tolist(),
+            sheet[ROUND].tolist() if ROUND in sheet else [None] * len(sheet),
+            source,
+        )
+    stats.count("duplicates", len(duplicates))
+    stats.count("warnings", len(duplicates))
+    extra += [(pos, FormatWarning, message) for pos, message in duplicates]
+    rows.append(sheet.index[[pos for pos, _, _ in extra]].to_numpy())
+    orders.append(len(rules) + np.arange(len(extra)))
+    rows, orders = np.concatenate(rows), np.concatenate(orders)
+    with stats.stage("write"):
+        for i in np.lexsort((orders, rows)):
+            if orders[i] >= len(rules):
+                _, error, message = extra[orders[i] - len(rules)]
+            else:
+                error, message, _, _ = rules[orders[i]]
+            error_or_warning = "Error" if error == FormatError else "Warning"
+            f.write(f"{error_or_warning} on row {rows[i]+2}: {message}\n")
+
+
+def write_issue(f, error, ix, message, stats=None):
+    error_or_warning = "Error" if error == FormatError else "Warning"
+    if stats is not None:
+        stats.count("errors" if error == FormatError else "warnings")
+    f.write(f"{error_or_warning} on row {ix+2}: {message}\n")
+
+
+# Checks a row (a dictionary keyed by column name) against every rule, then its LaTeX, and writes what they find to f.
+# commands is the set of known LaTeX commands (latex_lint.known_commands() if not given; pass it in when checking many rows).
+# If stats is given, the time spent on each rule and the number of issues are added to it.
+def check_row(row, ix, f, stats=None, commands=None):
+    for error, message, predicate, _ in rules:
+        if stats is None:
+            broken = predicate(row)
+        else:
+            with stats.stage(message):
+                broken = predicate(row)
+        if broken:
+            write_issue(f, error, ix, message, stats)
+    if commands is None:
+        commands = latex_lint.known_commands()
+    if stats is None:
+        issues = row_latex_issues(row, commands)
+    else:
+        with stats.stage("latex"):
+            issues = row_latex_issues(row, commands)
+    for error, message in issues:
+        write_issue(f, error, ix, message, stats)
+
+
+# Like make_error_file, but reads the .csv one row at a time with the csv module instead of loading it with pandas.
+# Reports the same issues in the same order. Likely duplicates are only looked for if dup_index is given, since that
+# needs every question kept in memory and numpy; they are written at the end.
+def stream_error_file(csv_file, f, stats=None, dup_index=None, source="sheet"):
+    texts, rounds = [], []
+    commands = latex_lint.known_commands()
+    for ix, row in enumerate(csv.DictReader(csv_file)):
+        check_row(
+            clean_cells(row),
+            ix,
+            f,
+            stats,
+            commands,
+        )
+        if dup_index is not None:
+            texts.append(duplicate_text(row.get(QUESTION), row.get(ANSWER)))
+            rounds.append(row.get(ROUND))
+        if stats is not None:
+            stats.count("rows")
+    if dup_index is None:
+        return
+    for pos, message in dup_index.check(texts, [ix + 2 for ix in range(len(texts))], rounds, source):
+        if stats is not None:
+            stats.count("duplicates")
+            stats.count("warnings")
+        f.write(f"Warning on row {pos+2}: {message}\n")
 
 
 def get_full_path(filename):
@@ -138,10 +488,74 @@ def get_full_path(filename):
 
 
 if __name__ == "__main__":
-    sheet_name, out_file_name = "sheet", "sheet_errors"
-    sheet = pd.read_csv(get_full_path(f"{sheet_name}.csv"))
-    with open(get_full_path(f"{out_file_name}.txt"), "w") as f:
-        make_error_file(sheet, f)
+    parser = argparse.ArgumentParser(description="Find formatting issues in a question sheet")
+    parser.add_argument("sheet", nargs="?", default=get_full_path("sheet.csv"))
+    parser.add_argument("output", nargs="?", default=get_full_path("sheet_errors.txt"))
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="check the sheet row by row without loading pandas",
+    )
+    parser.add_argument(
+        "--stats",
+        nargs="?",
+        const="-",
+        metavar="FILE",
+        help="write timings per check and issue counts as JSON (default: to stderr)",
+    )
+    parser.add_argument("--profile", metavar="FILE", help="dump a cProfile profile to FILE")
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"always read the sheet with pandas, rather than reusing the copy kept in {sheet_cache.CACHE_DIR}",
+    )
+    parser.add_argument(
+        "--dup-index",
+        metavar="FILE",
+        help="also look for duplicates of the questions in this index (made with --save-dup-index)",
+    )
+    parser.add_argument(
+        "--save-dup-index",
+        metavar="FILE",
+        help="save the index (with this sheet's questions added) to FILE, to check later sheets against",
+    )
+    parser.add_argument(
+        "--dup-source",
+        metavar="LABEL",
+        help="name this sheet's questions go under in the index, e.g. 2025 (default: the sheet's full path). "
+        "Questions already in the index under the same name are replaced",
+    )
+    args = parser.parse_args()
+    stats = Stats()
+    # Stream mode only looks for duplicates when an index is used, so that it stays light
+    dup_index = None
+    if args.dup_index:
+        dup_index = DuplicateIndex.load(args.dup_index)
+    elif args.save_dup_index or not args.stream:
+        dup_index = DuplicateIndex()
+    # The full path rather than the file name, since every year's sheet is usually called sheet.csv
+    source = args.dup_source or os.path.abspath(args.sheet)
+    with profiled(args.profile), open(args.output, "w") as f:
+        if args.stream:
+            with open(args.sheet, newline="") as csv_file:
+                # Timing every row check is a large part of the time taken, so it is only done when asked for
+                timed = args.stats is not None or args.profile is not None
+                stream_error_file(csv_file, f, stats if timed else None, dup_index, source)
+        else:
+            with stats.stage("load"):
+                import_pandas()
+                if args.no_cache:
+                    sheet = pd.read_csv(args.sheet)
+                else:
+                    sheet, hit = sheet_cache.load_cached(
+                        args.sheet, pd.read_csv, "find_sheet_issues", sheet_cache.code_version(pd.__version__)
+                    )
+                    stats.count("sheet_cache_hits" if hit else "sheet_cache_misses")
+            make_error_file(sheet, f, stats, dup_index, source)
+    if args.save_dup_index:
+        dup_index.save(args.save_dup_index)
+    if args.stats is not None:
+        stats.write(args.stats)
     """
     TODO: Add support for:
         using \read and not \readas
@@ -164,6 +578,5 @@ if __name__ == "__main__":
         units lowercase
         chemical equation reading guide
         negative numbers not in math mode
-        $, % in a question
     Change to per-row: for each row, run all the checks
     """
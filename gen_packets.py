@@ -1,21 +1,55 @@
 # Assumes the input on the command line is a spreadsheet (.csv), all categories have been concatenated, and all assignment can be done through round numbers (i.e. no paired questions)
 # The .csv should have the column names as seen below (i.e. be of the same format as our template)
+# Usage: python gen_packets.py sheet.csv [-o rounds-tex] [--template round_template.tex] [--year 2025] [--rounds 14] ...
+# (python gen_packets.py --help for everything)
 
-import pandas as pd
+import time
+
+START_TIME = time.perf_counter()
+
+import argparse
+import collections
+import csv
+import functools
+import glob
+import hashlib
+import io
+import json
+import math
+import os
 import random
 from enum import Enum
-from itertools import zip_longest
+from itertools import chain, islice, starmap, zip_longest
 import sys
 import re
-import warnings
 
-# it doesn't like the definition for mult_item_patterns
-warnings.filterwarnings("ignore", category=SyntaxWarning)
+import latex_lint
+import manifests
+from pipeline_stats import Stats, profiled
+import sheet_cache
+from sheet_format import LATEX_COLUMNS, clean_cells
+
+# Set by import_pandas, the first time a sheet is read with pandas (see sheet_engine)
+np = pd = None
+
 
-random.seed(0)
+def import_pandas():
+    global np, pd
+    import numpy as np
+    import pandas as pd
+
+
+SEED = 0
+random.seed(SEED)
 
 # Meta
 YEAR = 2025
+TEMPLATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "round_template.tex")
+
+# Build manifest, written to the output directory. Records a hash of each round's inputs so unchanged rounds can be skipped.
+MANIFEST = ".manifest.json"
+with open(__file__, "rb") as inf:
+    GENERATOR_VERSION = hashlib.sha256(inf.read()).hexdigest()
 
 # Column names
 ROUND_NUM = "Round"
@@ -28,6 +62,12 @@ ANSWER = "Answer"
 ACCEPT = "Accept"
 DO_NOT_ACCEPT = "Do Not Accept"
 W, X, Y, Z = "W", "X", "Y", "Z"
+DIFFICULTY = "Difficulty"
+QUALITY = "Quality"
+# Parsed Question objects, added by parse_sheet
+QUESTION_OBJ = "_question"
+# Where each row came from ("<file> row <n>"), for sheets put together from per-category files by read_category_sheets
+SOURCE_ROW = "_source_row"
 # Column values
 TOSSUP = "Toss-up"
 BONUS = "Bonus"
@@ -59,15 +99,9 @@ category_str_mappings = {
     Category.Energy: "Energy",
 }
 
-# Pattern, num_choices. In order of most restrictive to least restrictive.
-mult_item_patterns = [
-    ("(.*) 1\) (.*); 2\) (.*); 3\) (.*); 4\) (.*)", 4),
-    ("(.*) 1\) (.*) 2\) (.*) 3\) (.*) 4\) (.*)", 4),
-    ("(.*) 1\) (.*); 2\) (.*); 3\) (.*)", 3),
-    ("(.*) 1\) (.*) 2\) (.*) 3\) (.*)", 3),
-    ("(.*) 1\) (.*); 2\) (.*)", 2),
-    ("(.*) 1\) (.*) 2\) (.*)", 2),
-]
+# Item markers " 1) " to " 4) ". The lookahead keeps the match zero-width, so markers that share a space are all found.
+ITEM_MARKER = re.compile(r"(?= ([1-4])\) )")
+MAX_ITEMS = 4
 
 
 def make_item_block(items):
@@ -80,26 +114,88 @@ def make_item_block(items):
     return " ".join(block)
 
 
+# Finds where the items start in a single line. Returns a dictionary. Keys: item number, values: lists of
+# (start, end, semicolon) in order, where [start, end) is the " n) " marker and semicolon is whether it follows a ";"
+def find_item_markers(line):
+    markers = {n: [] for n in range(1, MAX_ITEMS + 1)}
+    for match in ITEM_MARKER.finditer(line):
+        start = match.start()
+        markers[int(match.group(1))].append((start, start + 4, line[start - 1 : start] == ";"))
+    return markers
+
+
+# Splits a line into its lead-in and num_items items, or returns None if there are not enough markers.
+# With semicolons, items 2 onwards must be introduced by "; n) " and the ";" is left out of the previous item.
+# Like a regex with greedy groups, the last markers that still leave room for the rest of the items are used: this walks
+# each list of markers backwards at most once.
+def split_items(line, markers, num_items, semicolons):
+    bounds = []
+    limit = len(line)
+    for n in range(num_items, 0, -1):
+        candidates = markers[n]
+        i = len(candidates) - 1
+        while i >= 0:
+            start, end, semicolon = candidates[i]
+            if n > 1 and semicolons:
+                if not semicolon:
+                    i -= 1
+                    continue
+                start -= 1
+            if end <= limit:
+                break
+            i -= 1
+        if i < 0:
+            return None
+        bounds.append((start, end))
+        limit = start
+    bounds.reverse()
+    items = [
+        line[end : bounds[i + 1][0] if i + 1 < num_items else len(line)]
+        for i, (start, end) in enumerate(bounds)
+    ]
+    return line[: bounds[0][0]], items
+
+
+# Turns the line "lead-in 1) a; 2) b; 3) c" (or with spaces instead of semicolons) of a body into the lead-in followed by
+# an item block, keeping the body's other lines as they are. Tries 4, 3 then 2 items, with semicolons first.
+# Returns None for bodies without items.
 def render_mult_item(body):
-    for pattern, num_items in mult_item_patterns:
-        match = re.search(pattern, body)
-        if not match:
-            continue
-        item_block = make_item_block([match.group(i + 2) for i in range(num_items)])
-        return "\n".join([match.group(1), item_block])
+    lines = body.split("\n")
+    markers = [find_item_markers(line) for line in lines]
+    for num_items in range(MAX_ITEMS, 1, -1):
+        for semicolons in (True, False):
+            for i, (line, line_markers) in enumerate(zip(lines, markers)):
+                split = split_items(line, line_markers, num_items, semicolons)
+                if split is None:
+                    continue
+                lead_in, items = split
+                return "\n".join(lines[:i] + [lead_in, make_item_block(items)] + lines[i + 1 :])
 
     return None
 
 
 def render_body(body, answer_choices, is_mc):
-    print(body)
     if is_mc:
         choices = f"\\wxyz{{{answer_choices[0]}}}{{{answer_choices[1]}}}{{{answer_choices[2]}}}{{{answer_choices[3]}}}"
         body = " ".join([body, choices])
     return body
 
 
+# Questions and pairs use __slots__ rather than a __dict__ each, since every round of a sheet is held in memory at once
 class Question:
+    __slots__ = (
+        "category",
+        "subcat",
+        "body",
+        "ans",
+        "accept",
+        "do_not_accept",
+        "is_mc",
+        "answer_choices",
+        "difficulty",
+        "quality",
+    )
+
     def __init__(
         self,
         category,
@@ -110,7 +206,9 @@ class Question:
         do_not_accept,
         is_mc=False,
         answer_choices=None,
-    ):  # By default, assumes short answer
+        difficulty=None,
+        quality=None,
+    ):  # By default, assumes short answer. difficulty and quality are None if the sheet doesn't give them.
         self.category = category
         self.subcat = subcat
         self.body = body
@@ -118,8 +216,13 @@ class Question:
         self.accept = accept
         self.do_not_accept = do_not_accept
         self.is_mc = is_mc
-        self.format = MC if is_mc else SA
         self.answer_choices = answer_choices
+        self.difficulty = difficulty
+        self.quality = quality
+
+    @property
+    def format(self):
+        return MC if self.is_mc else SA
 
     # Triple curly braces because:
     # Double curly braces to get the curly brace characters, {}
@@ -140,22 +243,25 @@ class Question:
             ans_note = accept
         elif do_not_accept is not None:
             ans_note = do_not_accept
-        if pd.isnull(self.ans):
+        if is_null(self.ans):
             self.ans = "None"
         ans = (
             " ".join((self.ans, f"({ans_note})")) if ans_note is not None else self.ans
         )
-        # Body of the question: stuff for if multiple choice or not
-        body = render_body(self.body, self.answer_choices, self.is_mc)
+        # Body of the question: item lists, and stuff for if multiple choice or not
+        body = self.body
+        if isinstance(body, str):
+            body = render_mult_item(body) or body
+        body = render_body(body, self.answer_choices, self.is_mc)
         return f"\\question{{{num}}}{{{q_type}}}{{{category}}}{{{self.format}}}{{{body}}}{{{ans}}}"
 
 
 class QuestionPair:
+    __slots__ = ("category", "tossup", "bonus")
+
     def __init__(self, tossup, bonus):
         assert tossup.category == bonus.category  # No mixed pairs
-        # if tossup.category == Category.Energy:
-        # Energy pairs should not be of the same category
-        # assert tossup.subcat is not None and tossup.subcat != bonus.subcat
+        assert can_pair(tossup, bonus)  # Energy pairs should not be of the same subcategory
         self.category = tossup.category
         self.tossup = tossup
         self.bonus = bonus
@@ -182,14 +288,32 @@ def get_category(row):
     return category_mappings[row[CATEGORY]]
 
 
+def is_null(val):
+    return val is None or (isinstance(val, float) and math.isnan(val))
+
+
+# Strings are interned, so repeated subcategories and accept notes share one copy each
 def null_to_none(val):
-    return val if not pd.isnull(val) else None
+    if type(val) is str:
+        return sys.intern(val)
+    return val if not is_null(val) else None
+
+
+# Row-wise version of numeric_column: a float, or None for anything that isn't a number
+def get_number(row, col):
+    try:
+        val = float(row.get(col))
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(val) else val
 
 
 def get_question(row):
     accept = null_to_none(row[ACCEPT])
     do_not_accept = null_to_none(row[DO_NOT_ACCEPT])
     subcat = null_to_none(row[SUBCAT])
+    difficulty = get_number(row, DIFFICULTY)
+    quality = get_number(row, QUALITY)
     if row[FORMAT] == SA:
         return Question(
             category=get_category(row),
@@ -198,6 +322,8 @@ def get_question(row):
             ans=row[ANSWER],
             accept=accept,
             do_not_accept=do_not_accept,
+            difficulty=difficulty,
+            quality=quality,
         )
     return Question(
         category=get_category(row),
@@ -208,32 +334,218 @@ def get_question(row):
         do_not_accept=do_not_accept,
         is_mc=True,
         answer_choices=(row[W], row[X], row[Y], row[Z]),
+        difficulty=difficulty,
+        quality=quality,
     )
 
 
-# Take a DataFrame representing a set of questions, and place questions into buckets based on category.
+# Column-wise version of null_to_none. Returns a list of plain Python values (interned str rather than numpy scalars).
+def nulls_to_none(col):
+    return [
+        sys.intern(val) if type(val) is str else val
+        for val in col.astype(object).where(col.notna(), None).tolist()
+    ]
+
+
+# Column-wise version of get_category. Unknown categories raise a KeyError, as with get_category.
+def get_categories(questions):
+    categories = questions[CATEGORY].map(category_mappings)
+    unknown = categories.isnull()
+    if unknown.any():
+        raise KeyError(questions[CATEGORY][unknown].iloc[0])
+    return categories
+
+
+# Column-wise version of the MC answer in get_question: "W) <text of choice W>"
+def get_mc_answers(questions):
+    import_pandas()
+    letters = questions[ANSWER]
+    choices = pd.Series(None, index=questions.index, dtype=object)
+    for letter in (W, X, Y, Z):
+        choices = choices.where(letters != letter, questions[letter])
+    answers = letters.astype(object) + ") " + choices
+    # Anything other than W-Z goes through the row-wise lookup (and raises the same errors)
+    other = letters.notna() & ~letters.isin((W, X, Y, Z))
+    for index in questions.index[other]:
+        answers[index] = get_question(questions.loc[index]).ans
+    return answers
+
+
+# The fields of the Questions for a whole DataFrame, worked out a column at a time: a tuple of lists, one per argument of
+# Question in order, for build_questions.
+def question_columns(questions):
+    if len(questions) == 0:
+        return ([],) * 10
+    is_mc = questions[FORMAT] != SA
+    answers = questions[ANSWER].astype(object)
+    if is_mc.any():
+        answers = answers.where(~is_mc, get_mc_answers(questions.loc[is_mc]))
+    is_mc = is_mc.tolist()
+    return (
+        get_categories(questions).tolist(),
+        nulls_to_none(questions[SUBCAT]),
+        questions[BODY].tolist(),
+        answers.tolist(),
+        nulls_to_none(questions[ACCEPT]),
+        nulls_to_none(questions[DO_NOT_ACCEPT]),
+        is_mc,
+        [
+            choices if mc else None
+            for mc, choices in zip(is_mc, zip(*(questions[c].tolist() for c in (W, X, Y, Z))))
+        ],
+        *(
+            [None if math.isnan(val) else val for val in numeric_column(questions, col).tolist()]
+            for col in (DIFFICULTY, QUALITY)
+        ),
+    )
+
+
+def build_questions(columns):
+    return [Question(*fields) for fields in zip(*columns)]
+
+
+# Builds the Questions for a whole DataFrame in one columnar pass, instead of calling get_question on every row.
+# Returns a list of Questions in row order.
+def frame_questions(questions):
+    return build_questions(question_columns(questions))
+
+
+# Take a list of Questions and place them into buckets based on category.
 # Returns a dictionary. Keys: Category, values: lists of Questions
-def bucket_round(questions):
+def bucket_questions(questions):
     buckets = {}
-    for index, row in questions.iterrows():
-        buckets.setdefault(get_category(row), []).append(get_question(row))
-    # Energy questions should be sorted by subcategory; then when pairing buckets, subcategories are paired together
-    if Category.Energy in buckets:
-        buckets[Category.Energy].sort(key=lambda x: x.subcat)
+    for q in questions:
+        buckets.setdefault(q.category, []).append(q)
     return buckets
 
 
-# Precondition: same number of questions per category
-def pair_buckets(tossup_buckets, bonus_buckets):
-    return {
-        cat: [
-            QuestionPair(tu, bonus)
-            for tu, bonus in zip(tossup_buckets[cat], bonus_buckets[cat])
-        ]
-        for cat in Category
-        if cat in tossup_buckets
-        # TODO: fix this, related to the category not having enough questions issue.
-    }
+# Take a DataFrame representing a set of questions, and place questions into buckets based on category.
+# Uses the QUESTION_OBJ column if the sheet has already been parsed.
+# Returns a dictionary. Keys: Category, values: lists of Questions
+def bucket_round(questions):
+    if QUESTION_OBJ in questions:
+        return bucket_questions(questions[QUESTION_OBJ])
+    return bucket_questions(frame_questions(questions))
+
+
+# Quality for sorting best first: questions without one come last
+def quality_key(question):
+    return -question.quality if question.quality is not None else math.inf
+
+
+# Returns (kept, left): the first n questions that keep within caps, a dictionary of the most questions of each
+# subcategory to keep (a subcategory that isn't in it has no limit), and the rest
+def keep_within(questions, n, caps):
+    kept, left = [], []
+    taken = collections.Counter()
+    for q in questions:
+        if len(kept) < n and taken[q.subcat] < caps.get(q.subcat, n):
+            taken[q.subcat] += 1
+            kept.append(q)
+        else:
+            left.append(q)
+    return kept, left
+
+
+# Pure-Python version of fill_mean for the difficulties of a list of Questions
+def question_difficulties(questions):
+    known = [q.difficulty for q in questions if q.difficulty is not None]
+    mean = sum(known) / len(known) if known else 0.0
+    return [mean if q.difficulty is None else q.difficulty for q in questions]
+
+
+# Energy pairs can't share a subcategory, and their toss-up needs one
+def can_pair(tossup, bonus):
+    return tossup.category != Category.Energy or (
+        tossup.subcat is not None and tossup.subcat != bonus.subcat
+    )
+
+
+# Pairs Energy toss-ups and bonuses (the same number of each, sorted by difficulty) so that no pair shares a subcategory.
+# Every toss-up in turn takes the easiest bonus left of another subcategory, unless that would leave the rest unpairable.
+# They can be paired as long as no subcategory has more questions left than there are pairs left; so once a subcategory
+# has exactly that many, this pair has to use one of them.
+def pair_subcats(tossups, bonuses):
+    queues = {}  # Subcategory -> deque of (position in bonuses, bonus), easiest first
+    for i, bonus in enumerate(bonuses):
+        queues.setdefault(bonus.subcat, collections.deque()).append((i, bonus))
+    left = collections.Counter(q.subcat for q in chain(tossups, bonuses))
+    pairs = []
+    for remaining, tossup in zip(range(len(tossups), 0, -1), tossups):
+        options = [s for s, n in left.items() if n == remaining and s != tossup.subcat]
+        if not options:
+            options = [s for s, queue in queues.items() if queue and s != tossup.subcat]
+        _, bonus = queues[min(options, key=lambda s: queues[s][0][0])].popleft()
+        left[tossup.subcat] -= 1
+        left[bonus.subcat] -= 1
+        pairs.append(QuestionPair(tossup, bonus))
+    return pairs
+
+
+# Pairs the toss-ups and bonuses of one category, the same way assign_rounds does: the best of each by Quality are kept
+# (as many toss-ups as bonuses), sorted by Difficulty (missing ones count as the category's mean) and paired off in order,
+# which keeps the total difference in difficulty between paired questions as small as possible.
+# Energy toss-ups need a subcategory, and one subcategory's toss-ups can only go with the others' bonuses (and the
+# other way around), so as many pairs are kept as that allows, the best questions are kept within those limits, and
+# they are paired by pair_subcats.
+# At most limit pairs are kept, if it is given (assign_rounds uses this to pick a category's questions for the sheet).
+# Returns (pairs, unmatched): pairs in the order of their toss-ups in the bucket, and a list of (TOSSUP or BONUS, Question)
+# for the questions left out.
+def pair_category(cat, tossups, bonuses, limit=None):
+    unmatched = []
+    energy = cat == Category.Energy
+    if energy:
+        unmatched += [(TOSSUP, q) for q in tossups if q.subcat is None]
+        tossups = [q for q in tossups if q.subcat is not None]
+    position = {id(q): i for i, q in enumerate(tossups)}
+    # Best first; ties keep bucket order, as in best_rows
+    tossups = sorted(tossups, key=quality_key)
+    bonuses = sorted(bonuses, key=quality_key)
+    n = min(len(tossups), len(bonuses), len(tossups) if limit is None else limit)
+    tossup_caps = bonus_caps = {}
+    if energy:
+        tossup_counts = collections.Counter(q.subcat for q in tossups)
+        bonus_counts = collections.Counter(q.subcat for q in bonuses)
+        for subcat in tossup_counts | bonus_counts:
+            n = min(n, len(tossups) - tossup_counts[subcat] + len(bonuses) - bonus_counts[subcat])
+        tossup_caps = {subcat: len(bonuses) - bonus_counts[subcat] for subcat in tossup_counts}
+    tossups, left = keep_within(tossups, n, tossup_caps)
+    unmatched += [(TOSSUP, q) for q in left]
+    if energy:
+        bonus_caps = {subcat: n - count for subcat, count in collections.Counter(q.subcat for q in tossups).items()}
+    bonuses, left = keep_within(bonuses, n, bonus_caps)
+    unmatched += [(BONUS, q) for q in left]
+
+    difficulty = dict(zip(map(id, tossups + bonuses), question_difficulties(tossups + bonuses)))
+    tossups.sort(key=lambda q: difficulty[id(q)])
+    bonuses.sort(key=lambda q: difficulty[id(q)])
+    pairs = pair_subcats(tossups, bonuses) if energy else list(map(QuestionPair, tossups, bonuses))
+    pairs.sort(key=lambda pair: position[id(pair.tossup)])
+    return pairs, unmatched
+
+
+# Pairs the toss-ups and bonuses of each category with pair_category. A category with only toss-ups or only bonuses
+# gets no pairs. If unmatched is a list, the (TOSSUP or BONUS, Question) left out of every category are added to it.
+# Returns a dictionary. Keys: Category, values: lists of QuestionPairs
+def pair_buckets(tossup_buckets, bonus_buckets, unmatched=None):
+    paired = {}
+    for cat in Category:
+        if cat not in tossup_buckets and cat not in bonus_buckets:
+            continue
+        pairs, left = pair_category(cat, tossup_buckets.get(cat, []), bonus_buckets.get(cat, []))
+        if pairs:
+            paired[cat] = pairs
+        if unmatched is not None:
+            unmatched += left
+    return paired
+
+
+# Describes a question left out by pair_buckets, for warnings
+def unmatched_message(q_type, question):
+    category = category_str_mappings[question.category]
+    subcat = f" ({question.subcat})" if question.subcat is not None else ""
+    body = question.body if isinstance(question.body, str) else ""
+    return f"unpaired {category}{subcat} {q_type.lower()}: {body[:60]}{'...' if len(body) > 60 else ''}"
 
 
 # Checks the boundaries between question chunks to make sure there are no consecutive pairs with the same category
@@ -244,24 +556,83 @@ def has_repeat_cat(chunks):
     return False
 
 
-# This function generates rounds in chunks of 6, 6, 6, and then 5. The first 3 have all 6 categories, and the last one is missing Energy.
+# Possible (first, last) positions for a chunk. A chunk with one pair starts and ends with it.
+def chunk_ends(chunk):
+    if len(chunk) == 1:
+        return [(0, 0)]
+    return [(f, l) for f in range(len(chunk)) for l in range(len(chunk)) if f != l]
+
+
+# Orders the pairs inside each chunk so that no two consecutive pairs share a category across chunk borders.
+# Each chunk is shuffled with rng first, and the first valid (first, last) choice in shuffled order is kept, so the result
+# is random but reproducible for a seeded rng. Only the ends of a chunk matter, so this works backwards once to find which
+# categories each chunk can start with (given that the rest of the round can still be completed), then forwards to pick.
+# Raises a ValueError if no valid order exists. If stats is given, counts the chunks and the (first, last) choices tried.
+def order_chunks(chunks, rng=random, stats=None):
+    chunks = [list(c) for c in chunks if c]
+    for c in chunks:
+        rng.shuffle(c)
+
+    # can_start[i]: categories chunk i can start with such that chunks i, i+1, ... can all be ordered
+    can_start = [set() for _ in chunks]
+    next_starts = None
+    for i in range(len(chunks) - 1, -1, -1):
+        for f, l in chunk_ends(chunks[i]):
+            if next_starts is None or next_starts - {chunks[i][l].category}:
+                can_start[i].add(chunks[i][f].category)
+        next_starts = can_start[i]
+    if chunks and not can_start[0]:
+        raise ValueError(
+            "No ordering without repeated categories exists for chunks "
+            + str([[category_str_mappings[p.category] for p in c] for c in chunks])
+        )
+
+    ordered = []
+    prev = None
+    tries = 0
+    for i, chunk in enumerate(chunks):
+        following = can_start[i + 1] if i + 1 < len(chunks) else None
+        for f, l in chunk_ends(chunk):
+            tries += 1
+            if (
+                chunk[f].category in can_start[i]
+                and chunk[f].category != prev
+                and (following is None or following - {chunk[l].category})
+            ):
+                break
+        middle = [p for j, p in enumerate(chunk) if j != f and j != l]
+        ordered.append([chunk[f]] + middle + ([chunk[l]] if l != f else []))
+        prev = chunk[l].category
+    if stats is not None:
+        stats.count("chunks", len(chunks))
+        stats.count("order_tries", tries)
+    return ordered
+
+
+# Buckets the toss-ups and bonuses of a round. round_qs is either a DataFrame or a list of rows read by read_rows.
+# Returns (tossup_buckets, bonus_buckets)
+def bucket_types(round_qs):
+    if isinstance(round_qs, list):
+        return tuple(
+            bucket_questions(get_question(row) for row in round_qs if row[TYPE] == t)
+            for t in (TOSSUP, BONUS)
+        )
+    return (
+        bucket_round(round_qs.loc[round_qs[TYPE] == TOSSUP]),
+        bucket_round(round_qs.loc[round_qs[TYPE] == BONUS]),
+    )
+
+
+# This function orders rounds in chunks of 6, 6, 6, and then 5. The first 3 have all 6 categories, and the last one is missing Energy.
 # It should still work for any number of round questions (i.e. not just 23 per round) as it goes through each of the buckets, adds a question
 # if present to the chunk, then extends the list of questions by that chunk.
-def gen_round(round_qs):  # Returns a list of QuestionPairs
-    tossup_buckets = bucket_round(round_qs.loc[round_qs[TYPE] == TOSSUP])
-    bonus_buckets = bucket_round(round_qs.loc[round_qs[TYPE] == BONUS])
-    paired_qs = pair_buckets(tossup_buckets, bonus_buckets)
-
-    chunks = []
-    for chunk in zip_longest(*list(paired_qs.values())):
-        good_chunk = [i for i in chunk if i is not None]
-        random.shuffle(good_chunk)
-        chunks.append(good_chunk)
-
-    # Shuffle each chunk until there are no repeat categories across borders
-    while has_repeat_cat(chunks):
-        for c in chunks:
-            random.shuffle(c)
+def order_round(paired_qs, rng=random, stats=None):  # Returns a list of QuestionPairs
+    chunks = [
+        [i for i in chunk if i is not None]
+        for chunk in zip_longest(*list(paired_qs.values()))
+    ]
+    chunks = order_chunks(chunks, rng, stats)
+    assert not has_repeat_cat(chunks)
 
     questions = []
     for chunk in chunks:
@@ -269,12 +640,303 @@ def gen_round(round_qs):  # Returns a list of QuestionPairs
     return questions
 
 
-# Returns a list of lists of QuestionPairs. Outer list is of length NUM_ROUNDS, and inner lists are of length ROUND_LENGTH.
-def gen_all_rounds(question_df):
-    return [
-        gen_round(question_df.loc[question_df[ROUND_NUM] == round_num])
-        for round_num in range(1, NUM_ROUNDS + 1)
-    ]
+# round_qs is either a DataFrame or a list of rows read by read_rows.
+def gen_round(round_qs, rng=random):  # Returns a list of QuestionPairs
+    unmatched = []
+    paired_qs = pair_buckets(*bucket_types(round_qs), unmatched)
+    for q_type, question in unmatched:
+        print(f"Warning: {unmatched_message(q_type, question)}", file=sys.stderr)
+    return order_round(paired_qs, rng)
+
+
+# Each round gets its own seeded random stream, so a round comes out the same no matter which rounds were generated before
+# it or which worker generated it.
+def round_rng(round_num):
+    return random.Random(f"{SEED}-{round_num}")
+
+
+# Splits the sheet (a DataFrame, or a list of rows from read_rows) by round number in a single pass.
+# Yields (round number, DataFrame or list of rows) for rounds 1 to num_rounds, with no rows for rounds with no questions.
+# A round's DataFrame is only taken from the sheet when it is reached, so one round's copy is held at a time rather than
+# a copy of the whole sheet.
+def iter_rounds(question_df, num_rounds=NUM_ROUNDS):
+    if isinstance(question_df, list):
+        groups = {}
+        for row in question_df:
+            groups.setdefault(row[ROUND_NUM], []).append(row)
+        for round_num in range(1, num_rounds + 1):
+            yield round_num, groups.pop(round_num, [])
+        return
+    positions = question_df.groupby(ROUND_NUM, sort=False).indices
+    for round_num in range(1, num_rounds + 1):
+        yield round_num, question_df.iloc[positions.get(round_num, [])]
+
+
+# Returns a dictionary. Keys: round numbers 1 to num_rounds, values: DataFrames or lists of rows (see iter_rounds)
+def split_rounds(question_df, num_rounds=NUM_ROUNDS):
+    return dict(iter_rounds(question_df, num_rounds))
+
+
+# Parses the whole sheet at once rather than once per round and type, for callers that want every Question up front
+# (write_tex and gen_all_rounds parse a round at a time instead). Rows from read_rows are parsed per round.
+def parse_sheet(question_df):
+    if isinstance(question_df, list) or QUESTION_OBJ in question_df:
+        return question_df
+    return question_df.assign(**{QUESTION_OBJ: frame_questions(question_df)})
+
+
+# The number in a Round cell, as pandas.to_numeric would read it (whole numbers as ints), or the text itself if it isn't one
+def parse_round_num(val):
+    if "_" in val:  # float() reads 1_000, pandas doesn't
+        return val
+    try:
+        number = float(val)
+    except ValueError:
+        return val
+    return int(number) if number.is_integer() else number
+
+
+# Reads a .csv with the csv module, for sheets small enough that importing pandas would take longer than the work itself.
+# Returns a list of dictionaries keyed by column name, with empty cells as NaN and numeric round numbers as numbers.
+def read_rows(path):
+    with open(path, newline="") as inf:
+        return [clean_row(row) for row in csv.DictReader(inf)]
+
+
+# A row from csv.DictReader with empty cells as NaN (see sheet_format.clean_cells) and a numeric round number as a number
+def clean_row(row):
+    row = clean_cells(row)
+    if isinstance(row.get(ROUND_NUM), str):
+        row[ROUND_NUM] = parse_round_num(row[ROUND_NUM])
+    return row
+
+
+# Splits the text of a .csv into its records, without parsing them. A record spans several lines when a quoted cell has a
+# line break in it; the quotes on its lines only balance out on its last line.
+def csv_records(text):
+    records, pending = [], None
+    for line in text.split("\n"):
+        if pending is not None:
+            pending += "\n" + line
+            if line.count('"') % 2:
+                records.append(pending)
+                pending = None
+        elif line.count('"') % 2:
+            pending = line
+        elif line and line != "\r":  # csv.DictReader skips blank lines too
+            records.append(line)
+    if pending is not None:
+        records.append(pending)
+    return records
+
+
+# Parses a single record with the header's fields, the way csv.DictReader would, or returns None if it isn't exactly one
+# row (a stray quote can make csv_records join two records)
+def parse_record(record, fields):
+    try:
+        values = list(csv.reader([record]))
+    except csv.Error:
+        return None
+    if len(values) != 1:
+        return None
+    values = values[0]
+    row = dict(zip(fields, values))
+    if len(values) > len(fields):
+        row[None] = values[len(fields) :]
+    for field in fields[len(values) :]:
+        row[field] = None
+    return clean_row(row)
+
+
+# Like read_rows, but only parses the records that aren't in previous, a dictionary kept by the caller between calls
+# (see watch) that maps the text of each record to its row, and is updated in place. Records that haven't changed keep
+# the same row dictionaries, so write_tex finds their rounds unchanged without hashing them again.
+# Returns (rows, records), the text of each row's record. A sheet that doesn't split into records cleanly is read whole.
+def reread_rows(path, previous):
+    with open(path, newline="") as inf:
+        records = csv_records(inf.read())
+    header = records.pop(0) if records else ""
+    if previous.get("header") != header:
+        previous.clear()
+        previous["header"] = header
+        previous["fields"] = next(csv.reader([header]), [])
+    rows = list(map(previous.get("rows", {}).get, records))
+    for i, row in enumerate(rows):
+        if row is None:
+            rows[i] = parse_record(records[i], previous["fields"])
+            if rows[i] is None:
+                previous.clear()
+                rows = read_rows(path)
+                return rows, [None] * len(rows)
+    previous["rows"] = dict(zip(records, rows))
+    return rows, records
+
+
+# Numeric version of a column, with anything that isn't a number (or a missing column) as NaN
+def numeric_column(question_df, col):
+    if col not in question_df:
+        return np.full(len(question_df), np.nan)
+    return pd.to_numeric(question_df[col], errors="coerce").to_numpy(dtype=float)
+
+
+# NaNs replaced by the mean of the rest (or 0 if there is nothing else)
+def fill_mean(values):
+    known = values[~np.isnan(values)]
+    return np.where(np.isnan(values), known.mean() if len(known) else 0.0, values)
+
+
+# Standard deviation of the values that aren't NaN, or 1 if there is none
+def spread(values):
+    known = values[~np.isnan(values)]
+    return known.std() if len(known) and known.std() > 0 else 1.0
+
+
+# The n rows with the highest quality, best first. Questions without a quality come last; ties keep sheet order.
+def best_rows(rows, quality, n):
+    return rows[np.lexsort((rows, -np.nan_to_num(quality[rows], nan=-np.inf)))][:n]
+
+
+# Solves the assignment problem for a square cost matrix with the Hungarian algorithm, in O(n^3).
+# Returns an array assigned, where row i is assigned to column assigned[i], with the lowest total cost.
+def min_cost_assignment(cost):
+    n = len(cost)
+    u, v = np.zeros(n + 1), np.zeros(n + 1)  # Potentials of rows and columns
+    row_of = np.zeros(n + 1, dtype=int)  # Row (1-based) assigned to each column; column 0 is the row being added
+    way = np.zeros(n + 1, dtype=int)
+    for i in range(1, n + 1):
+        row_of[0] = i
+        col = 0
+        min_slack = np.full(n + 1, np.inf)
+        used = np.zeros(n + 1, dtype=bool)
+        while row_of[col] != 0:
+            used[col] = True
+            row = row_of[col]
+            slack = cost[row - 1] - u[row] - v[1:]
+            free = ~used[1:]
+            better = free & (slack < min_slack[1:])
+            min_slack[1:][better] = slack[better]
+            way[1:][better] = col
+            next_col = 1 + np.argmin(np.where(free, min_slack[1:], np.inf))
+            delta = min_slack[next_col]
+            u[row_of[used]] += delta
+            v[used] -= delta
+            min_slack[~used] -= delta
+            col = next_col
+        while col != 0:
+            row_of[col] = row_of[way[col]]
+            col = way[col]
+    assigned = np.empty(n, dtype=int)
+    assigned[row_of[1:] - 1] = np.arange(n)
+    return assigned
+
+
+# Picks and pairs the Energy rows for assign_rounds with pair_category, so that every pair (and so every round) follows the
+# subcategory rule. rows are the category's toss-up and bonus rows. Returns arrays of the toss-up and bonus row of each of
+# at most limit pairs.
+def pair_subcat_rows(question_df, cat, tossup_rows, bonus_rows, difficulty, quality, limit):
+    subcats = question_df[SUBCAT].iloc[np.concatenate([tossup_rows, bonus_rows])]
+    subcat = dict(zip(np.concatenate([tossup_rows, bonus_rows]).tolist(), nulls_to_none(subcats)))
+    row_of = {}
+
+    def stub(row):
+        question = Question(
+            cat,
+            subcat[row],
+            None,
+            None,
+            None,
+            None,
+            difficulty=None if np.isnan(difficulty[row]) else float(difficulty[row]),
+            quality=None if np.isnan(quality[row]) else float(quality[row]),
+        )
+        row_of[id(question)] = row
+        return question
+
+    pairs, _ = pair_category(
+        cat, [stub(row) for row in tossup_rows.tolist()], [stub(row) for row in bonus_rows.tolist()], limit
+    )
+    return (
+        np.array([row_of[id(pair.tossup)] for pair in pairs], dtype=int),
+        np.array([row_of[id(pair.bonus)] for pair in pairs], dtype=int),
+    )
+
+
+# Chooses round numbers for a sheet that doesn't have them. For each category, the num_rounds * CATEGORY_TARGETS
+# best toss-ups and bonuses (by Quality) are kept, sorted by Difficulty and paired off in order, so paired questions are
+# about as hard as each other. Energy questions are picked and paired by pair_subcat_rows instead, so that no pair shares
+# a subcategory. The pairs are then dealt to the rounds in difficulty order, snaking back and forth
+# (1, 2, ..., n, n, ..., 2, 1, ...) so every round gets a similar spread; ties in difficulty are dealt in quality order.
+# Finally, each category's hands are matched to rounds so as to keep the rounds' total difficulty and quality (relative to
+# each category's mean, and in units of their spread over the sheet) as even as possible: a hand that is harder than
+# average goes to a round that is easier than average so far, and so on. Adding hand h to round r increases the sum of
+# squares of the totals by 2 * totals[r] . hand[h] (plus a constant), which min_cost_assignment minimizes.
+# targets is a dictionary like CATEGORY_TARGETS: the number of pairs of each category per round.
+# Returns a copy of the sheet with a ROUND_NUM column; questions that weren't kept have no round.
+def assign_rounds(question_df, num_rounds=NUM_ROUNDS, targets=CATEGORY_TARGETS):
+    import_pandas()
+    difficulty = numeric_column(question_df, DIFFICULTY)
+    quality = numeric_column(question_df, QUALITY)
+    categories = get_categories(question_df).to_numpy()
+    types = question_df[TYPE].to_numpy()
+    rounds = np.zeros(len(question_df), dtype=int)  # 0: not in any round
+    # Difficulty and quality of each round so far, relative to each category's mean
+    totals = np.zeros((num_rounds, 2))
+    scale = [spread(difficulty), spread(quality)]
+    for cat, target in targets.items():
+        in_cat = categories == cat
+        if cat == Category.Energy:
+            tossups, bonuses = pair_subcat_rows(
+                question_df,
+                cat,
+                *(np.flatnonzero(in_cat & (types == t)) for t in (TOSSUP, BONUS)),
+                difficulty,
+                quality,
+                num_rounds * target,
+            )
+        else:
+            tossups, bonuses = (
+                best_rows(np.flatnonzero(in_cat & (types == t)), quality, num_rounds * target)
+                for t in (TOSSUP, BONUS)
+            )
+        num_pairs = min(len(tossups), len(bonuses))
+        if num_pairs == 0:
+            continue
+        cat_difficulty = fill_mean(np.where(in_cat, difficulty, np.nan))
+        cat_quality = fill_mean(np.where(in_cat, quality, np.nan))
+        if cat != Category.Energy:
+            tossups, bonuses = (
+                rows[:num_pairs][np.argsort(cat_difficulty[rows[:num_pairs]], kind="stable")]
+                for rows in (tossups, bonuses)
+            )
+        pair_difficulty = (cat_difficulty[tossups] + cat_difficulty[bonuses]) / 2
+        pair_quality = (cat_quality[tossups] + cat_quality[bonuses]) / 2
+
+        position = np.arange(num_pairs)
+        hand = np.where(
+            position // num_rounds % 2 == 0,
+            position % num_rounds,
+            num_rounds - 1 - position % num_rounds,
+        )
+        pair_hand = np.empty(num_pairs, dtype=int)
+        pair_hand[np.lexsort((-pair_quality, pair_difficulty))] = hand
+        hands = np.stack(
+            [
+                np.bincount(pair_hand, weights=(x - x.mean()) / x_scale, minlength=num_rounds)
+                for x, x_scale in zip((pair_difficulty, pair_quality), scale)
+            ],
+            axis=1,
+        )
+        hand_round = min_cost_assignment(hands @ totals.T)
+        totals[hand_round] += hands
+        rounds[tossups] = rounds[bonuses] = hand_round[pair_hand] + 1
+    return question_df.assign(**{ROUND_NUM: pd.array(np.where(rounds > 0, rounds, None), dtype="Int64")})
+
+
+# Yields num_rounds lists of QuestionPairs, of length ROUND_LENGTH. Each round is only split off and generated when the
+# previous one has been used.
+def gen_all_rounds(question_df, num_rounds=NUM_ROUNDS):
+    for round_num, round_qs in iter_rounds(question_df, num_rounds):
+        yield gen_round(round_qs, round_rng(round_num))
 
 
 # Takes in a list of QuestionPairs. Returns a string corresponding to the blocks
@@ -284,37 +946,819 @@ def gen_question_tex(question_pairs):
     )
 
 
-# Takes in a list of rounds, which are lists of QuestionPairs. Pass in the result from gen_all_rounds.
+# Takes in an iterable of rounds, which are lists of QuestionPairs, such as gen_all_rounds. Yields each round's blocks.
 def gen_round_tex(rounds):
-    return [gen_question_tex(r) for r in rounds]
+    for r in rounds:
+        yield gen_question_tex(r)
 
 
-# Takes in template, round_number, tex_block, outputs the string of the tex file
-def return_tex(template, round_number, tex_block):
-    res = ""
-    for line in template:
-        newline = (
-            line.replace("INSERT_QUESTIONS_HERE", tex_block)
-            .replace("ROUND_NUMBER", str(round_number))
-            .replace("YEAR", str(YEAR))
+# Same as gen_question_tex, but writes the blocks straight to outf
+def write_question_tex(outf, question_pairs):
+    for i, pair in enumerate(question_pairs):
+        if i:
+            outf.write("\\hrulefill\n")
+        outf.write(pair.render(i + 1))
+
+
+# Compiled templates are tuples of literal text and placeholder names, alternating, starting and ending with literal text
+TEMPLATE_FIELDS = re.compile("(INSERT_QUESTIONS_HERE|ROUND_NUMBER|YEAR)")
+
+
+@functools.lru_cache(maxsize=None)
+def compile_template(path, mtime_ns):
+    with open(path, "r") as inf:
+        return tuple(TEMPLATE_FIELDS.split(inf.read()))
+
+
+# Returns the compiled template at path. Templates are only parsed again when the file changes.
+def load_template(path=TEMPLATE):
+    return compile_template(os.path.abspath(path), os.stat(path).st_mtime_ns)
+
+
+# Writes a round's tex file to outf, from a compiled template. write_questions(outf) writes the questions.
+def write_template(outf, template, round_number, write_questions, year=YEAR):
+    values = {"ROUND_NUMBER": str(round_number), "YEAR": str(year)}
+    for i, segment in enumerate(template):
+        if i % 2 == 0:
+            outf.write(segment)
+        elif segment == "INSERT_QUESTIONS_HERE":
+            write_questions(outf)
+        else:
+            outf.write(values[segment])
+
+
+# Takes in a compiled template, round_number, tex_block, outputs the string of the tex file
+def return_tex(template, round_number, tex_block, year=YEAR):
+    res = io.StringIO()
+    write_template(res, template, round_number, lambda f: f.write(tex_block), year)
+    return res.getvalue()
+
+
+# Generates, renders and writes a single round. Returns the name of the written file and the round's stats (as a dictionary).
+# This is a top-level function so that it can be run in a worker process.
+def build_round(round_num, round_qs, template, directory, year=YEAR):
+    stats = Stats()
+    with stats.stage("bucket"):
+        tossup_buckets, bonus_buckets = bucket_types(round_qs)
+    unmatched = []
+    with stats.stage("pair"):
+        paired_qs = pair_buckets(tossup_buckets, bonus_buckets, unmatched)
+    for q_type, question in unmatched:
+        stats.warn(unmatched_message(q_type, question))
+    with stats.stage("order"):
+        question_pairs = order_round(paired_qs, round_rng(round_num), stats)
+    stats.count("rows", len(round_qs))
+    stats.count("tossups", sum(map(len, tossup_buckets.values())))
+    stats.count("bonuses", sum(map(len, bonus_buckets.values())))
+    stats.count("pairs", len(question_pairs))
+    stats.count("unmatched", len(unmatched))
+    outname = round_path(directory, round_num)
+    # Rendering writes into the file's buffer as it goes; "write" is the time spent opening and flushing the file
+    with stats.stage("write"):
+        outf = open(outname, "w+")
+    with outf:
+        with stats.stage("render"):
+            write_template(
+                outf,
+                template,
+                round_num,
+                lambda f: write_question_tex(f, question_pairs),
+                year,
+            )
+        with stats.stage("write"):
+            outf.flush()
+    return outname, stats.as_dict()
+
+
+# Rounds handed to a process pool at once by write_tex. Later rounds aren't split off the sheet until earlier ones are
+# built, so only this many rounds' rows are held (and queued for the workers) at a time.
+def max_pending_rounds(workers):
+    return 2 * (workers or os.cpu_count() or 1)
+
+
+# Like executor.map, but takes an iterable of argument tuples and only keeps max_pending of them submitted at a time, so
+# later arguments aren't made until earlier results are in. Yields the results in order.
+def bounded_map(executor, fn, jobs, max_pending):
+    pending = collections.deque()
+    for job in jobs:
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+        pending.append(executor.submit(fn, *job))
+    while pending:
+        yield pending.popleft().result()
+
+
+def round_path(directory, round_num):
+    return os.path.join(directory, f"Round {round_num}.tex")
+
+
+# Hash of everything that goes into a round's tex file: its rows, the template, the meta constants and this script
+def round_hash(round_qs, template, year=YEAR):
+    if isinstance(round_qs, list):
+        rows = json.dumps(round_qs)
+    else:
+        rows = round_qs.drop(columns=QUESTION_OBJ, errors="ignore").to_csv(index=False)
+    h = hashlib.sha256()
+    for part in (GENERATOR_VERSION, str(SEED), str(year), "".join(template), rows):
+        h.update(part.encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+# Takes in the sheet (a DataFrame, or a list of rows from read_rows) and writes to a given directory with the correct tex
+# files. Returns the names of the files written.
+# The rounds go through split, hash and build one at a time, so each round is written and let go of before the next one is
+# split off the sheet (or, with a pool, a few rounds at a time; see max_pending_rounds). Questions are parsed a round at a
+# time too, by build_round, unless the sheet is already parsed (see parse_sheet).
+# Rounds whose hash matches the manifest and whose file still exists are skipped (and keep their mtimes) unless force is set.
+# With workers > 1 (or None, for one per CPU) the rounds are built in a process pool; the output is the same either way.
+# A pool (a concurrent.futures executor) can also be passed in, to share one between several sheets.
+# If stats (a pipeline_stats.Stats) is given, the time spent in each stage and each round is added to it.
+# cache is a dictionary the caller can keep between calls (see watch): it holds the manifest, so the file isn't read
+# again, and each round's rows with their hash, so rounds whose rows compare equal to last time aren't hashed again.
+def write_tex(
+    csv,
+    directory,
+    workers=1,
+    force=False,
+    template=TEMPLATE,
+    year=YEAR,
+    num_rounds=NUM_ROUNDS,
+    stats=None,
+    cache=None,
+    pool=None,
+):
+    if stats is None:
+        stats = Stats()
+    with stats.stage("template"):
+        template = load_template(template)
+    if cache is None:
+        cache = {}
+    if "manifest" not in cache:
+        cache["manifest"] = manifests.read_manifest(directory, MANIFEST)
+    previous = {} if force else cache["manifest"]
+    hashed = cache.setdefault("rounds", {})  # Round number -> (rows, template, year, hash)
+    hashes, stale = {}, []
+
+    # Yields the arguments of build_round for each round whose file is out of date, splitting and hashing as it goes
+    def stale_rounds():
+        rounds = iter_rounds(csv, num_rounds)
+        while True:
+            with stats.stage("split"):
+                round_num, round_qs = next(rounds, (None, None))
+            if round_num is None:
+                return
+            key = str(round_num)
+            with stats.stage("hash"):
+                cached = hashed.get(round_num)
+                if cached is not None and cached[:3] == (round_qs, template, year):
+                    hashes[key] = cached[3]
+                else:
+                    hashes[key] = round_hash(round_qs, template, year)
+                    if isinstance(round_qs, list):  # DataFrames aren't kept, since comparing them costs about as much as hashing
+                        hashed[round_num] = (round_qs, template, year, hashes[key])
+            if previous.get(key) != hashes[key] or not os.path.exists(round_path(directory, round_num)):
+                stale.append(round_num)
+                yield round_num, round_qs, template, directory, year
+            else:
+                stats.count("rounds_skipped")
+
+    # A pool is only worth it for more than one round, so look ahead for a second stale round before choosing
+    jobs = stale_rounds()
+    first = list(islice(jobs, 2))
+    jobs = chain(first, jobs)
+    own_pool = None
+    if len(first) > 1 and pool is None and workers != 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        pool = own_pool = ProcessPoolExecutor(max_workers=workers)
+    written = []
+    # "build" includes the time spent splitting and hashing the rounds after the first two, since that happens as the
+    # rounds are needed
+    with stats.stage("build"):
+        if len(first) > 1 and pool is not None:
+            built = bounded_map(pool, build_round, jobs, max_pending_rounds(workers))
+        else:
+            built = starmap(build_round, jobs)
+        try:
+            for outname, round_stats in built:
+                stats.add_round(stale[len(written)], round_stats)
+                written.append(outname)
+        finally:
+            if own_pool is not None:
+                own_pool.shutdown()
+    stats.count("rounds_written", len(written))
+    cache["manifest"] = hashes
+    manifests.write_manifest(directory, MANIFEST, hashes)
+    return written
+
+
+# Sheets smaller than this are read with the csv module rather than pandas when --engine is auto
+FAST_PATH_MAX_BYTES = 1_000_000
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate round .tex files from a question sheet")
+    parser.add_argument(
+        "sheet",
+        nargs="*",
+        help="the question sheet, as a .csv, or several per-category .csvs (or a directory of them) to be combined",
+    )
+    parser.add_argument("-o", "--output", default="rounds-tex", help="directory for the .tex files")
+    parser.add_argument("--template", default=TEMPLATE)
+    parser.add_argument("--year", type=int, default=YEAR)
+    parser.add_argument("--rounds", type=int, default=NUM_ROUNDS, help="number of rounds")
+    parser.add_argument(
+        "--workers", type=int, default=None, help="processes to use (default: one per CPU)"
+    )
+    parser.add_argument("--force", action="store_true", help="regenerate every round")
+    parser.add_argument("--pdf", action="store_true", help="compile the rounds afterwards")
+    parser.add_argument(
+        "--compiler",
+        default=None,
+        help="command that compiles a round with --pdf, as in compile_rounds.py (default: pdflatex)",
+    )
+    parser.add_argument(
+        "--pdf-workers",
+        type=int,
+        default=None,
+        help="rounds to compile at once with --pdf (default: one per CPU)",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="keep running, and regenerate the rounds that changed whenever the sheet or template is saved",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["auto", "pandas", "stdlib"],
+        default="auto",
+        help=f"how to read the sheet (auto: stdlib below {FAST_PATH_MAX_BYTES} bytes; "
+        f"sheets without a {ROUND_NUM} column are always read with pandas and given rounds automatically)",
+    )
+    parser.add_argument(
+        "--no-latex-check",
+        action="store_true",
+        help="don't check the LaTeX in the sheet's cells before writing the rounds",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"always parse the sheet, rather than reusing the parsed copy kept in {sheet_cache.CACHE_DIR}",
+    )
+    parser.add_argument(
+        "--stats",
+        nargs="?",
+        const="-",
+        metavar="FILE",
+        help="write timings per stage and per round, and question counts, as JSON (default: to stderr)",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="FILE",
+        help="dump a cProfile profile to FILE (worker processes are not profiled; use --workers 1)",
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="JOBS",
+        help="build every sheet listed in the JSON file JOBS, sharing one process pool (see run_batch)",
+    )
+    parser.set_defaults(targets=CATEGORY_TARGETS)  # Only batch jobs set other targets
+    args = parser.parse_args(argv)
+    if not args.sheet and args.batch is None:
+        parser.error("a sheet (or --batch) is required")
+    args.sheet = args.sheet[0] if len(args.sheet) == 1 else args.sheet or None
+    return args
+
+
+# Whether sheet (a path or a list of paths, as in parse_args) is a single .csv rather than per-category ones
+def is_single_sheet(sheet):
+    return isinstance(sheet, str) and not os.path.isdir(sheet)
+
+
+# The .csv files sheet stands for: itself, the .csv files in it if it is a directory, or those of each path in a list
+def sheet_paths(sheet):
+    if not isinstance(sheet, str):
+        return [path for s in sheet for path in sheet_paths(s)]
+    if os.path.isdir(sheet):
+        return sorted(glob.glob(os.path.join(sheet, "*.csv")))
+    return [sheet]
+
+
+# Columns every sheet needs. Per-category files can leave out CATEGORY if their name gives it.
+SHEET_COLUMNS = [TYPE, FORMAT, SUBCAT, BODY, W, X, Y, Z, ANSWER, ACCEPT, DO_NOT_ACCEPT]
+# Per-category files are named like "Prepacket - Earth and Space.csv" (or just "Earth and Space.csv")
+CATEGORY_FILE = re.compile(r"(?:.* - )?(.+)\.csv", re.IGNORECASE)
+
+
+# The category a file's name gives, as in category_str_mappings, or None if its name isn't a category's
+def file_category(path):
+    match = CATEGORY_FILE.fullmatch(os.path.basename(path))
+    if match is None or match.group(1) not in category_mappings:
+        return None
+    return category_str_mappings[category_mappings[match.group(1)]]
+
+
+# Reads one per-category .csv and checks that it has the columns of a sheet and that its categories agree with its name.
+# The Category column is set from the file's name (if it gives one), and SOURCE_ROW to each row's place in the file.
+def read_category_sheet(path):
+    question_df = pd.read_csv(path)
+    category = file_category(path)
+    missing = [c for c in SHEET_COLUMNS if c not in question_df]
+    if category is None and CATEGORY not in question_df:
+        missing.append(CATEGORY)
+    if missing:
+        raise ValueError(f"{path} is missing columns: {', '.join(missing)}")
+    if category is not None:
+        if CATEGORY in question_df:
+            given = question_df[CATEGORY]
+            wrong = given.notna() & (given.map(category_mappings) != category_mappings[category])
+            if wrong.any():
+                row = wrong.to_numpy().argmax()
+                raise ValueError(
+                    f"{path} is for {category} questions, but row {row + 2} is in category {given.iloc[row]}"
+                )
+        question_df[CATEGORY] = category
+    name = os.path.basename(path)
+    question_df[SOURCE_ROW] = [f"{name} row {i + 2}" for i in range(len(question_df))]
+    return question_df
+
+
+# Reads per-category .csv files in a thread pool (pandas' parser lets go of the GIL, so they are read in parallel) and
+# combines them into one sheet, in the order given. Either all of them or none of them must have a Round column.
+def read_category_sheets(paths):
+    import_pandas()
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=min(len(paths), os.cpu_count() or 1)) as pool:
+        frames = list(pool.map(read_category_sheet, paths))
+    with_rounds = [path for path, frame in zip(paths, frames) if ROUND_NUM in frame]
+    if with_rounds and len(with_rounds) < len(paths):
+        raise ValueError(
+            f"Only some of the sheets have a {ROUND_NUM} column ({', '.join(map(os.path.basename, with_rounds))})"
+        )
+    return pd.concat(frames, ignore_index=True)
+
+
+def has_round_column(path):
+    with open(path, newline="") as inf:
+        return ROUND_NUM in next(csv.reader(inf), [])
+
+
+# Whether the sheet (as in parse_args) has a Round column, in every file if it is several
+def sheet_has_rounds(sheet):
+    return all(has_round_column(path) for path in sheet_paths(sheet))
+
+
+# Sheets without a Round column, and per-category sheets, are always read with pandas, since assign_rounds and
+# read_category_sheets need it
+def sheet_engine(path, engine="auto"):
+    if not is_single_sheet(path):
+        return "pandas"
+    if engine == "auto":
+        engine = "stdlib" if os.path.getsize(path) < FAST_PATH_MAX_BYTES else "pandas"
+    if engine == "stdlib" and not has_round_column(path):
+        engine = "pandas"
+    return engine
+
+
+def read_sheet(path, engine="auto"):
+    if sheet_engine(path, engine) == "stdlib":
+        return read_rows(path)
+    import_pandas()
+    question_df = pd.read_csv(path)
+    coerce_round_numbers(question_df)
+    return question_df
+
+
+# Reads the sheet with pandas and gives it rounds with assign_rounds if it has no Round column. path is a .csv, or a list
+# of per-category ones for read_category_sheets.
+# Returns the DataFrame, which only depends on the sheet, the number of rounds, the targets and this file, so it can be
+# kept in the sheet cache. Its Questions are left to build_round, a round at a time, so that those of the whole sheet are
+# never held at once.
+def prepare_sheet(path, num_rounds=NUM_ROUNDS, targets=CATEGORY_TARGETS, stats=None):
+    if stats is None:
+        stats = Stats()
+    import_pandas()
+    with stats.stage("read"):
+        question_df = pd.read_csv(path) if isinstance(path, str) else read_category_sheets(path)
+    if ROUND_NUM not in question_df:
+        with stats.stage("assign"):
+            question_df = assign_rounds(question_df, num_rounds, targets)
+    return question_df
+
+
+def cache_version():
+    return sheet_cache.code_version(GENERATOR_VERSION, pd.__version__, np.__version__)
+
+
+# Settings that change what prepare_sheet returns. Pickled Categories refer to their module by name, so entries made when
+# this file is run as a script (__main__) and when it is imported (gen_packets) are kept apart.
+def cache_settings(args):
+    return (__name__, args.rounds, sorted((c.name, n) for c, n in args.targets.items()))
+
+
+MAX_LATEX_REPORTED = 10  # Problems listed by check_sheet_latex; the rest are only counted
+
+
+# Joins (position, message) pairs into one line, in order of position in the sheet, listing at most MAX_LATEX_REPORTED of them
+def list_problems(problems):
+    problems = sorted(problems)
+    listed = [message for _, message in problems[:MAX_LATEX_REPORTED]]
+    if len(problems) > MAX_LATEX_REPORTED:
+        listed.append(f"and {len(problems) - MAX_LATEX_REPORTED} more")
+    return "; ".join(listed)
+
+
+# Runs latex_lint over every cell of the sheet (a DataFrame, or a list of rows) that goes into the .tex files.
+# Returns a list of (position, column, problem, unknown commands), as check_cells finds them.
+def latex_findings(question_df, commands):
+    findings = []
+    for col in LATEX_COLUMNS:
+        if isinstance(question_df, list):
+            cells = [row.get(col) for row in question_df]
+        elif col in question_df:
+            cells = question_df[col].tolist()
+        else:
+            continue
+        for pos, problem, unknown in latex_lint.check_cells(cells, commands):
+            findings.append((pos, col, problem, unknown))
+    return findings
+
+
+# Prints the unknown commands in findings (from latex_findings) as a warning, and raises a ValueError listing the broken
+# cells if there are any. label gives the spreadsheet row (and file) of a position.
+def report_latex(findings, label):
+    broken = [(pos, f"{label(pos)}, {col}: {problem}") for pos, col, problem, _ in findings if problem is not None]
+    unknown = [(pos, f"{label(pos)}, {col}: {', '.join(commands)}") for pos, col, _, commands in findings if commands]
+    if unknown:
+        print(
+            f"Warning: {len(unknown)} cells use LaTeX commands the template doesn't define ({list_problems(unknown)})",
+            file=sys.stderr,
+        )
+    if broken:
+        raise ValueError(
+            f"{len(broken)} cells have broken LaTeX ({list_problems(broken)}); "
+            "run find_sheet_issues.py for details, or pass --no-latex-check"
         )
-        res += newline
-    return res
 
 
-# Takes in .csv and writes to a given directory with the correct tex files
-def write_tex(csv, directory):
-    with open("./round_template.tex", "r") as inf:
-        template = inf.readlines()
-    for i, tex_block in enumerate(gen_round_tex(gen_all_rounds(csv))):
-        outname = f"./{directory}/Round {i+1}.tex"
-        with open(outname, "w+") as outf:
-            outf.write(return_tex(template, i + 1, tex_block))
+def list_row_label(pos):
+    return f"row {pos + 2}"
+
+
+# Returns a function giving the spreadsheet row (and file) of a position in the sheet
+def row_labels(question_df):
+    if isinstance(question_df, list):
+        return list_row_label
+    if SOURCE_ROW in question_df:
+        return question_df[SOURCE_ROW].tolist().__getitem__
+    return [f"row {i + 2}" for i in question_df.index].__getitem__
+
+
+# Checks the LaTeX of every cell that goes into the .tex files with latex_lint, so that cells that would break pdflatex
+# are found before anything is written or compiled. Commands not defined in the template (or known to latex_lint) are
+# printed as a warning. Raises a ValueError listing the broken cells, by spreadsheet row (and file), if there are any.
+def check_sheet_latex(question_df, template=TEMPLATE):
+    report_latex(latex_findings(question_df, latex_lint.known_commands(template)), row_labels(question_df))
+
+
+# Round cells that aren't numbers (such as "TB") leave their question out of every round. read_rows keeps them as text,
+# which matches no round, but pandas reads the whole column as text if it has one, so here the column is made numeric in
+# place, with NaN for those cells, for the sheet to be split the same way by either engine. If stats is given, the rows
+# with such a cell are listed in a warning.
+def coerce_round_numbers(question_df, stats=None):
+    if isinstance(question_df, list):
+        bad = [(pos, row[ROUND_NUM]) for pos, row in enumerate(question_df) if isinstance(row.get(ROUND_NUM), str)]
+    elif ROUND_NUM in question_df and not pd.api.types.is_numeric_dtype(question_df[ROUND_NUM]):
+        given = question_df[ROUND_NUM]
+        numbers = pd.to_numeric(given, errors="coerce")
+        positions = np.flatnonzero(numbers.isna() & given.notna())
+        bad = list(zip(positions.tolist(), given.iloc[positions].tolist()))
+        question_df[ROUND_NUM] = numbers
+    else:
+        return
+    if bad and stats is not None:
+        label = row_labels(question_df)
+        stats.warn(
+            f"{len(bad)} rows have a {ROUND_NUM} that isn't a number, so they are in no round "
+            f"({list_problems([(pos, f'{label(pos)}: {value}') for pos, value in bad])})"
+        )
+
+
+# Reads the sheet as set up by args: small sheets with the csv module, others (and per-category sheets) with
+# prepare_sheet, through the sheet cache unless args.no_cache is set. Then checks its LaTeX with check_sheet_latex,
+# unless args.no_latex_check is set.
+def load_sheet(args, stats):
+    path = args.sheet if is_single_sheet(args.sheet) else sheet_paths(args.sheet)
+    if not path:
+        raise ValueError(f"No .csv files in {sheet_name(args.sheet)}")
+    with stats.stage("load"):
+        if sheet_engine(args.sheet, args.engine) == "stdlib":
+            all_questions = read_rows(path)
+        else:
+            if args.no_cache:
+                all_questions = prepare_sheet(path, args.rounds, args.targets, stats)
+            else:
+                import_pandas()
+                all_questions, hit = sheet_cache.load_cached(
+                    path,
+                    lambda path: prepare_sheet(path, args.rounds, args.targets, stats),
+                    "gen_packets",
+                    cache_version(),
+                    cache_settings(args),
+                )
+                stats.count("sheet_cache_hits" if hit else "sheet_cache_misses")
+    stats.count("sheet_rows", len(all_questions))
+    coerce_round_numbers(all_questions, stats)
+    if not isinstance(all_questions, list) and not sheet_has_rounds(args.sheet):
+        assigned = int(all_questions[ROUND_NUM].notna().sum())
+        stats.count("assigned", assigned)
+        print(
+            f"No {ROUND_NUM} column: assigned {assigned} of {len(all_questions)} questions to rounds",
+            file=sys.stderr,
+        )
+    if not args.no_latex_check:
+        with stats.stage("latex"):
+            check_sheet_latex(all_questions, args.template)
+    return all_questions
+
+
+# Reads the sheet for watch. state is a dictionary watch keeps between builds. A single sheet with a Round column is
+# re-read with reread_rows, and only the cells of new or edited records have their LaTeX checked (the findings of the rest
+# are kept in state), so a save costs little more than reading the file, however big the sheet is. Other sheets are read
+# by load_sheet each time, without the sheet cache, since writing a new entry on every save would only slow it down.
+def load_watched_sheet(args, stats, state):
+    if not is_single_sheet(args.sheet) or not has_round_column(args.sheet):
+        return load_sheet(argparse.Namespace(**{**vars(args), "no_cache": True}), stats)
+    with stats.stage("load"):
+        rows, records = reread_rows(args.sheet, state.setdefault("rows", {}))
+    stats.count("sheet_rows", len(rows))
+    coerce_round_numbers(rows, stats)
+    if not args.no_latex_check:
+        with stats.stage("latex"):
+            commands = latex_lint.known_commands(args.template)
+            if state.get("commands") != commands:
+                state["commands"] = commands
+                state["findings"] = {}
+            known = state["findings"]  # Record -> its findings, as (column, problem, unknown commands)
+            new = [pos for pos, record in enumerate(records) if record is None or record not in known]
+            found = {pos: [] for pos in new}
+            for pos, col, problem, unknown in latex_findings([rows[pos] for pos in new], commands):
+                found[new[pos]].append((col, problem, unknown))
+            findings = [found[pos] if pos in found else known[record] for pos, record in enumerate(records)]
+            state["findings"] = {record: f for record, f in zip(records, findings) if record is not None}
+            report_latex(
+                [(pos, *finding) for pos, row_findings in enumerate(findings) for finding in row_findings],
+                list_row_label,
+            )
+    return rows
+
+
+def sheet_name(sheet):
+    return sheet if isinstance(sheet, str) else ", ".join(sheet)
+
+
+# How often --watch checks the sheet and template for changes, in seconds
+WATCH_INTERVAL = 0.2
+
+
+def file_signature(*paths):
+    try:
+        return tuple((os.stat(p).st_mtime_ns, os.stat(p).st_size) for p in paths)
+    except FileNotFoundError:  # Some editors delete the file and write a new one
+        return None
+
+
+# Rebuilds the rounds whose rows changed every time the sheet or template is saved, until interrupted.
+# The parsed rows (see load_watched_sheet) and the round hashes are kept in memory between builds. A change is only picked up once the file has stopped changing for
+# one interval, so a sheet that is still being written isn't read half-way. Errors in the sheet are printed and the
+# previous round files are left alone until the next save.
+def watch(args, interval=WATCH_INTERVAL):
+    cache = {"manifest": {}} if args.force else {}
+    state = {}
+    built = last_seen = None
+    print(f"Watching {sheet_name(args.sheet)} (Ctrl-C to stop)", file=sys.stderr)
+    while True:
+        # A directory is listed again each time, so that adding or removing a file counts as a change
+        signature = file_signature(*sheet_paths(args.sheet), args.template)
+        if signature is not None and signature == last_seen and signature != built:
+            built = signature
+            start = time.perf_counter()
+            stats = Stats()
+            try:
+                written = write_tex(
+                    load_watched_sheet(args, stats, state),
+                    args.output,
+                    workers=1,
+                    template=args.template,
+                    year=args.year,
+                    num_rounds=args.rounds,
+                    cache=cache,
+                    stats=stats,
+                )
+            except Exception as e:
+                print(f"{time.strftime('%H:%M:%S')} error: {type(e).__name__}: {e}", file=sys.stderr)
+            else:
+                names = ", ".join(os.path.basename(w) for w in written) or "nothing changed"
+                print(
+                    f"{time.strftime('%H:%M:%S')} {names} ({(time.perf_counter() - start) * 1000:.0f} ms)",
+                    file=sys.stderr,
+                )
+                print_warnings(stats)
+                if args.pdf and written:
+                    compile_pdfs(args, stats, force=False)
+        last_seen = signature
+        time.sleep(interval)
+
+
+# Prints the warnings collected while building rounds (such as questions that couldn't be paired)
+def print_warnings(stats, prefix=""):
+    for warning in stats.warnings:
+        print(f"{prefix}Warning: {warning}", file=sys.stderr)
+
+
+# Reads a sheet and writes its rounds, as set up by args. Returns the engine used and the names of the files written.
+def build(args, stats, pool=None):
+    os.makedirs(args.output, exist_ok=True)
+    all_questions = load_sheet(args, stats)
+    engine = "stdlib" if isinstance(all_questions, list) else "pandas"
+    return engine, write_tex(
+        all_questions,
+        args.output,
+        workers=args.workers,
+        force=args.force,
+        template=args.template,
+        year=args.year,
+        num_rounds=args.rounds,
+        stats=stats,
+        pool=pool,
+    )
+
+
+# Compiles the rounds in args.output with compile_rounds.py and prints the results. Returns the number that failed.
+def compile_pdfs(args, stats, force=None):
+    from compile_rounds import DEFAULT_COMPILER, FAILED, SKIPPED, compile_rounds
+
+    with stats.stage("pdf"):
+        results = compile_rounds(
+            args.output,
+            compiler=args.compiler or DEFAULT_COMPILER,
+            workers=args.pdf_workers,
+            force=args.force if force is None else force,
+        )
+    for result in results:
+        if result.status != SKIPPED or not args.watch:
+            print(result)
+    failed = sum(result.status == FAILED for result in results)
+    stats.count("pdfs_failed", failed)
+    return failed
+
+
+# Settings a batch job can give. Any it leaves out come from the command line (or its defaults).
+JOB_KEYS = {"sheet", "output", "template", "year", "rounds", "targets", "engine", "force"}
+
+
+# Reads a batch file: a JSON list of jobs (or {"jobs": [...]}), each a dictionary with the keys in JOB_KEYS, e.g.
+#   [{"sheet": "hs.csv", "output": "hs-tex", "year": 2025},
+#    {"sheet": "ms.csv", "output": "ms-tex", "rounds": 10, "targets": {"Energy": 3}}]
+# Paths a job gives are relative to the batch file (those from the command line stay relative to the working directory),
+# and "sheet" can also be a list of per-category .csv files or a directory of them (as on the command line). targets gives
+# pairs per round by category name, for sheets without rounds. Jobs can't share an output directory, since they would
+# overwrite each other's rounds and manifest, so at most one job can leave out "output".
+# Returns a list of argument namespaces like the one parse_args returns, one per job.
+def read_jobs(path, args):
+    with open(path, "r") as inf:
+        jobs = json.load(inf)
+    if isinstance(jobs, dict):
+        jobs = jobs["jobs"]
+    base = os.path.dirname(os.path.abspath(path))
+    job_args = []
+    outputs = {}  # Output directory -> the job (numbered from 1) writing to it
+    for i, job in enumerate(jobs):
+        unknown = set(job) - JOB_KEYS
+        if unknown or "sheet" not in job:
+            raise ValueError(
+                f"Job {i + 1} in {path}: "
+                + (f"unknown keys {sorted(unknown)}" if unknown else "no sheet given")
+            )
+        settings = {**vars(args), "batch": None, **job}
+        for key in ("output", "template"):
+            if key in job:
+                settings[key] = os.path.join(base, job[key])
+        output = os.path.normcase(os.path.abspath(settings["output"]))
+        if output in outputs:
+            raise ValueError(
+                f"Jobs {outputs[output]} and {i + 1} in {path} both write to {settings['output']}; "
+                "give each job its own \"output\""
+            )
+        outputs[output] = i + 1
+        if isinstance(settings["sheet"], str):
+            settings["sheet"] = os.path.join(base, settings["sheet"])
+        else:
+            settings["sheet"] = [os.path.join(base, sheet) for sheet in settings["sheet"]]
+        if "targets" in job:
+            settings["targets"] = {
+                **CATEGORY_TARGETS,
+                **{category_mappings[c]: n for c, n in job["targets"].items()},
+            }
+        job_args.append(argparse.Namespace(**settings))
+    return job_args
+
+
+# Builds every job in the batch file in this process, with one process pool shared by all of them (and the templates
+# compiled once each). A job that fails is reported and the rest still run. Writes a JSON report with each job's stats
+# (or error) to --stats, or next to the batch file as <name>.report.json. Returns the number of jobs that failed.
+def run_batch(args):
+    jobs = read_jobs(args.batch, args)
+    report = {"jobs": []}
+    pool = None
+    if args.workers != 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        pool = ProcessPoolExecutor(max_workers=args.workers)
+    try:
+        for job in jobs:
+            stats = Stats()
+            result = {"sheet": job.sheet, "output": job.output, "year": job.year, "rounds": job.rounds}
+            try:
+                engine, result["written"] = build(job, stats, pool)
+            except Exception as e:
+                result["error"] = f"{type(e).__name__}: {e}"
+                print(f"{sheet_name(job.sheet)}: {result['error']}", file=sys.stderr)
+            else:
+                print(
+                    f"{sheet_name(job.sheet)}: wrote {len(result['written'])} of {job.rounds} rounds to {job.output} in "
+                    f"{time.perf_counter() - stats.start:.2f}s ({engine} engine)",
+                    file=sys.stderr,
+                )
+                print_warnings(stats, f"{sheet_name(job.sheet)}: ")
+                if job.pdf and compile_pdfs(job, stats):
+                    result["error"] = "some rounds failed to compile"
+            result["stats"] = stats.as_dict()
+            report["jobs"].append(result)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    report["wall_time"] = time.perf_counter() - START_TIME
+    report["failed"] = sum("error" in job for job in report["jobs"])
+    path = args.stats or os.path.splitext(args.batch)[0] + ".report.json"
+    if path == "-":
+        print(json.dumps(report, indent=2), file=sys.stderr)
+    else:
+        with open(path, "w") as outf:
+            json.dump(report, outf, indent=2)
+            outf.write("\n")
+        print(
+            f"Ran {len(jobs)} jobs ({report['failed']} failed) in {report['wall_time']:.2f}s, report in {path}",
+            file=sys.stderr,
+        )
+    return report["failed"]
+
+
+# Mistakes in the sheet or the batch file (broken LaTeX, missing columns, wrong categories, ...) raise a ValueError, which
+# is printed without a traceback
+def main(argv=None):
+    args = parse_args(argv)
+    startup = time.perf_counter() - START_TIME
+    if args.batch:
+        try:
+            with profiled(args.profile):
+                failed = run_batch(args)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        sys.exit(1 if failed else 0)
+    stats = Stats()
+    stats.stages["startup"] = startup
+    if args.watch:
+        os.makedirs(args.output, exist_ok=True)
+        try:
+            watch(args)
+        except KeyboardInterrupt:
+            pass
+        return
+    try:
+        with profiled(args.profile):
+            engine, written = build(args, stats)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(
+        f"Wrote {len(written)} of {args.rounds} rounds to {args.output} in "
+        f"{time.perf_counter() - START_TIME:.2f}s (startup {startup * 1000:.0f} ms, {engine} engine)",
+        file=sys.stderr,
+    )
+    print_warnings(stats)
+    failed = compile_pdfs(args, stats) if args.pdf else 0
+    if args.stats is not None:
+        stats.write(args.stats)
+    if failed:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
-    all_questions = pd.read_csv(sys.argv[1])
-    write_tex(all_questions, "rounds-tex")
+    main()
 
 # TODO: check category target matches in find_sheet_issues. check that short answer questions do NOT have WXYZ and MC questions have ALL wxyz.
 
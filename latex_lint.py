@@ -0,0 +1,185 @@
+# Checks the LaTeX in sheet cells in a single pass over each cell, so that cells that would break pdflatex are found
+# before anything is compiled. Used by find_sheet_issues.py and, as a pre-check, by gen_packets.py.
+# A cell is broken if its braces, math mode ($...$, $$...$$, \(...\), \[...\]) and environments aren't properly nested
+# and closed, if it has an unescaped % (which comments out the rest of the line), & or #, or if it uses ^, _ or a
+# math-only command outside math mode. Commands that are neither defined in the round template nor in KNOWN_COMMANDS
+# are reported separately, since they may just be missing from the list.
+
+import functools
+import os
+import re
+
+TEMPLATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "round_template.tex")
+
+# Standard LaTeX, amsmath, mhchem, braket and xcolor commands that questions use
+MATH_COMMANDS = frozenset(
+    """
+    alpha beta gamma delta epsilon varepsilon zeta eta theta vartheta iota kappa lambda mu nu xi pi varpi rho varrho
+    sigma varsigma tau upsilon phi varphi chi psi omega Gamma Delta Theta Lambda Xi Pi Sigma Upsilon Phi Psi Omega
+    frac dfrac tfrac sqrt binom cdot times div pm mp ast star circ bullet oplus otimes
+    approx neq ne leq le geq ge ll gg sim simeq equiv cong propto perp parallel mid nmid
+    infty partial nabla int iint iiint oint sum prod lim limsup liminf sup inf max min det gcd arg dim ker hom Pr
+    log ln lg exp sin cos tan sec csc cot arcsin arccos arctan sinh cosh tanh coth
+    left right middle big Big bigg Bigg bigl bigr Bigl Bigr langle rangle lfloor rfloor lceil rceil lvert rvert
+    cdots vdots ddots hat bar vec dot ddot tilde widehat widetilde overline underbrace overbrace overrightarrow
+    to rightarrow leftarrow Rightarrow Leftarrow leftrightarrow Leftrightarrow longrightarrow longleftarrow mapsto
+    rightleftharpoons uparrow downarrow iff implies
+    in notin ni subset subseteq supset supseteq cup cap setminus emptyset varnothing forall exists neg land lor
+    angle measuredangle triangle square prime pmod bmod mod mathrm mathbf mathit mathcal mathbb mathsf mathtt
+    operatorname displaystyle textstyle boldsymbol hbar ell Re Im aleph
+    """.split()
+)
+KNOWN_COMMANDS = MATH_COMMANDS | frozenset(
+    """
+    text textit textbf texttt textrm textsf textsc textup textnormal emph underline mbox textsubscript textsuperscript
+    textcolor color textdegree textendash textemdash textasciitilde textbackslash textbar ldots dots quad qquad
+    hspace vspace noindent newline linebreak par item begin end centering small footnotesize large Large
+    ce pu bra ket braket Bra Ket Braket
+    S P AA aa o O ss ae AE oe OE l L i j c v u H r k d b t LaTeX TeX today
+    """.split()
+)
+# Commands whose argument is text, even inside math
+TEXT_COMMANDS = frozenset(
+    "text textit textbf texttt textrm textsf textsc textup textnormal emph mbox textsubscript textsuperscript".split()
+)
+# mhchem commands, whose argument has its own syntax in which ^ and _ are fine
+CHEM_COMMANDS = frozenset(["ce", "pu"])
+# Environments that start math mode, and ones that can only be used in math mode
+MATH_ENVIRONMENTS = frozenset(
+    "equation equation* align align* gather gather* multline multline* displaymath math".split()
+)
+IN_MATH_ENVIRONMENTS = frozenset("matrix pmatrix bmatrix vmatrix Vmatrix aligned gathered cases array split".split())
+
+# Math delimiters: opener -> closer
+MATH_DELIMITERS = {"$": "$", "$$": "$$", "\\(": "\\)", "\\[": "\\]"}
+MATH_CLOSERS = {"\\)": "\\(", "\\]": "\\["}
+
+TOKEN = re.compile(r"\\(?:begin|end)\s*\{([^{}]*)\}|\\([A-Za-z@]+)\*?|\\.|\$\$?|[{}%&#^_]", re.S)
+# Cells without any of these can't have a problem, so they aren't lexed at all
+SPECIAL = re.compile(r"[\\{}$%&#^_]")
+NEWCOMMAND = re.compile(
+    r"\\(?:(?:re|provide)?newcommand\*?\s*\{?\s*\\([A-Za-z@]+)|def\s*\\([A-Za-z@]+)|DeclareMathOperator\*?\s*\{\s*\\([A-Za-z@]+))"
+)
+COMMENT = re.compile(r"(?<!\\)%.*")
+
+
+# Commands defined in the template, with comments left out
+@functools.lru_cache(maxsize=None)
+def _template_commands(path, mtime_ns):
+    with open(path, "r") as inf:
+        text = COMMENT.sub("", inf.read())
+    return frozenset(name for match in NEWCOMMAND.finditer(text) for name in match.groups() if name)
+
+
+# Returns the commands a cell may use: KNOWN_COMMANDS and those defined in the template at path
+def known_commands(path=TEMPLATE):
+    return KNOWN_COMMANDS | _template_commands(os.path.abspath(path), os.stat(path).st_mtime_ns)
+
+
+# Returns (problem, unknown): a description of the first thing in text that would break pdflatex (or None), and the
+# commands it uses that aren't in commands (in order, without repeats). Everything after a problem that breaks the
+# nesting is still checked for unknown commands, but not for further problems, since they would mostly be knock-on ones.
+def check_latex(text, commands):
+    if type(text) is not str or not SPECIAL.search(text):
+        return None, []
+    # Open groups, innermost last, with the mode outside each. A group is "{", "text" or "chem" for braces, a math
+    # delimiter, or "\begin{name}" for an environment.
+    stack = []
+    mode = "text"  # "text", "math" or "chem": the mode of the innermost group that sets one
+    problem = None
+    unknown = {}
+    argument = None  # (mode, end) for a TEXT_COMMANDS or CHEM_COMMANDS command whose argument may come next
+    for match in TOKEN.finditer(text):
+        token, environment, name = match.group(0, 1, 2)
+        if name is not None:
+            if name not in commands:
+                unknown["\\" + name] = None
+            argument = None
+            if name in TEXT_COMMANDS:
+                argument = ("text", match.end())
+            elif name in CHEM_COMMANDS:
+                argument = ("chem", match.end())
+            elif problem is None and mode == "text" and name in MATH_COMMANDS:
+                problem = f"\\{name} outside math mode"
+            continue
+        if problem is not None:
+            continue
+        top = stack[-1][0] if stack else None
+        if token == "{":
+            if argument is not None and argument[1] == match.start():
+                stack.append((argument[0], mode))
+                mode = argument[0]
+            else:
+                stack.append(("{", mode))
+        elif token == "}":
+            if top in ("{", "text", "chem"):
+                mode = stack.pop()[1]
+            elif top is None:
+                problem = "unmatched }"
+            else:
+                problem = f"}} closes a {{ opened outside {describe(top)}"
+        elif token == "$" or token == "$$":
+            if mode != "math":
+                stack.append((token, mode))
+                mode = "math"
+            elif top == "$" or top == "$$":
+                mode = stack.pop()[1]
+                if token == "$$" and top == "$":  # $a$$b$ is two inline formulas
+                    stack.append(("$", mode))
+                    mode = "math"
+                elif token == "$" and top == "$$":
+                    problem = "$$ closed with $"
+            elif top == "{":
+                problem = f"{token} closes math while a {{ is still open"
+            else:
+                problem = f"{token} inside {describe(top)}"
+        elif token in ("^", "_"):
+            if mode == "text":
+                problem = f"{token} outside math mode"
+        elif environment is not None:
+            group = f"\\begin{{{environment}}}"
+            if token.startswith("\\begin"):
+                if mode != "math" and environment in IN_MATH_ENVIRONMENTS:
+                    problem = f"{group} outside math mode"
+                stack.append((group, mode))
+                if environment in MATH_ENVIRONMENTS:
+                    mode = "math"
+            elif top == group:
+                mode = stack.pop()[1]
+            else:
+                problem = f"\\end{{{environment}}} without a matching {group}"
+        elif token == "\\(" or token == "\\[":
+            if mode == "math":
+                problem = f"{token} inside math mode"
+            else:
+                stack.append((token, mode))
+                mode = "math"
+        elif token in MATH_CLOSERS:
+            if top == MATH_CLOSERS[token]:
+                mode = stack.pop()[1]
+            else:
+                problem = f"{token} without a matching {MATH_CLOSERS[token]}"
+        elif token == "%" or token == "#":
+            problem = f"unescaped {token}"
+        elif token == "&":
+            if not any(group.startswith("\\begin") for group, _ in stack):
+                problem = "unescaped &"
+        argument = None
+    if problem is None and stack:
+        problem = f"{describe(stack[-1][0])} is never closed"
+    return problem, list(unknown)
+
+
+def describe(group):
+    if group in MATH_DELIMITERS:
+        return f"{group}...{MATH_DELIMITERS[group]} math"
+    return group
+
+
+# Checks every cell in cells (any iterable). Yields (position, problem, unknown) for the cells with a problem or unknown
+# commands, with problem and unknown as returned by check_latex.
+def check_cells(cells, commands):
+    for position, text in enumerate(cells):
+        problem, unknown = check_latex(text, commands)
+        if problem is not None or unknown:
+            yield position, problem, unknown
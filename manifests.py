@@ -0,0 +1,23 @@
+# Manifests: small JSON files kept in an output directory that map each file written there to a hash of what it was made
+# from, so that files whose inputs haven't changed can be skipped. Shared by gen_packets.py (.manifest.json, round hashes)
+# and compile_rounds.py (.pdf-manifest.json, hashes of the .tex files that compiled).
+
+import json
+import os
+
+
+# Returns the manifest called name in directory as a dictionary, or an empty one if it is missing or unreadable
+def read_manifest(directory, name):
+    try:
+        with open(os.path.join(directory, name), "r") as inf:
+            return json.load(inf)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+# Writes the manifest to a temporary file first, so that an interrupted run never leaves half of one behind
+def write_manifest(directory, name, manifest):
+    path = os.path.join(directory, name)
+    with open(path + ".tmp", "w") as outf:
+        json.dump(manifest, outf, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
@@ -4,6 +4,9 @@ import sys
 import re
 import os
 import csv
+import functools
+import heapq
+from bisect import bisect_left
 
 pd.options.mode.chained_assignment = None
 
@@ -23,33 +26,46 @@ MC = "Multiple Choice"
 np.random.seed(1234)
 
 
+# texify patterns, compiled once
+SUBSCRIPT_RE = re.compile(r"(\s)([^$\s]*[\^_][^$\s}]*?)([\s?.])")
+ENUMERATE_RES = [
+    (
+        re.compile("".join(str(j) + r"\)([\s\S]*)" for j in range(1, i + 1))),
+        r"\\begin{enumerate}[label={\\arabic*}), noitemsep]"
+        + "".join(r"\\item " + "\\" + str(j) for j in range(1, i + 1))
+        + r"\\end{enumerate}",
+    )
+    for i in range(7, 1, -1)
+]
+WXYZ_RE = re.compile(r"W\)([\s\S]*)X\)([\s\S]*)Y\)([\s\S]*)Z\)([\s\S]*)")
+TRAILING_SPACE_RE = re.compile(r"\s+$")
+PERCENT_RE = re.compile(r"([^\\])%")
+
+TEXIFY_CACHE_SIZE = 1 << 16
+
+
+@functools.lru_cache(maxsize=TEXIFY_CACHE_SIZE)
 def texify(text):
     if text.count("{") != text.count("}"):
         print(f"Warning: mismatched brackets: {text}")
     assert "\read{" not in text, f"use \\readas not \\read: {text}"
     # Subscripts and superscripts inside math mode
     if "$" not in text:
-        text = re.sub(r"(\s)([^$\s]*[\^_][^$\s}]*?)([\s?.])", r"\1$\2$\3", text)
+        text = SUBSCRIPT_RE.sub(r"\1$\2$\3", text)
     # Use enumerate environments
-    for i in range(7, 1, -1):
-        t1 = "".join(str(j) + r"\)([\s\S]*)" for j in range(1, i + 1))
-        t2 = (
-            r"\\begin{enumerate}[label={\\arabic*}), noitemsep]"
-            + "".join(r"\\item " + "\\" + str(j) for j in range(1, i + 1))
-            + r"\\end{enumerate}"
-        )
-        text = re.sub(t1, t2, text)
-    text = re.sub(
-        r"W\)([\s\S]*)X\)([\s\S]*)Y\)([\s\S]*)Z\)([\s\S]*)",
-        r"\\wxyz{\1}{\2}{\3}{\4}",
-        text,
-    )
+    for pattern, repl in ENUMERATE_RES:
+        text = pattern.sub(repl, text)
+    text = WXYZ_RE.sub(r"\\wxyz{\1}{\2}{\3}{\4}", text)
     # Remove all trailing whitespace
-    text = re.sub(r"\s+$", r"", text)
-    text = re.sub(r"([^\\])%", r"\1\\%", text)
+    text = TRAILING_SPACE_RE.sub(r"", text)
+    text = PERCENT_RE.sub(r"\1\\%", text)
     return text
 
 
+def texify_column(col):  # texifies a whole column, once per distinct cell
+    return col.map({text: texify(text) for text in pd.unique(col)})
+
+
 def get_data(f):  # pulls out everything from the .csv file
     qs = pd.read_csv(f, delimiter=",", quotechar='"')
     assert set(np.unique(qs["Category"])) == set(categories)
@@ -77,89 +93,50 @@ def assign(qs, rand=(lambda d: d)):  # rand: perturbation function
     cat_id = categories.index(qs["Category"][0])
     per_round = category_targets[cat_id]
     target = per_round * num_rounds
-    curr_id = 0
-    for i in range(len(qs)):
-        if qs["pair_id"][i] == -1:
-            if np.count_nonzero(qs["Pairing"] == qs["Pairing"][i]) == 2:
-                bool_arr = qs["Pairing"] == qs["Pairing"][i]
-                for j in range(len(bool_arr)):
-                    if bool_arr[j]:
-                        qs.at[j, "pair_id"] = curr_id
-                        qs.at[j, "forced_pair"] = True
-                # print(qs['Pairing'] == qs['Pairing'][i])
-                # qs.at[qs['Pairing'] == qs['Pairing'][i], 'pair_id'] = curr_id
-                # qs.at[qs['Pairing'] == qs['Pairing'][i], 'forced_pair'] = True
-                curr_id += 1
-
-    for i in range(len(qs)):
-        if qs.pair_id[i] != -1:
-            bool_arr = qs.pair_id == qs.pair_id[i]
-            average = np.mean(qs.Difficulty[bool_arr])
-            for j in range(len(bool_arr)):
-                if bool_arr[j]:
-                    qs.at[j, "new_diff"] = average
-            rand_num = rand(qs.new_diff[i])
-            for j in range(len(bool_arr)):
-                if bool_arr[j]:
-                    qs.at[j, "new_diff"] = rand_num
-
-        # qs.at[qs.pair_id == qs.pair_id[i], 'new_diff'] = np.mean(
-        # qs.Difficulty[qs.pair_id == qs.pair_id[i]])
-        # qs.at[qs.pair_id == qs.pair_id[i], 'new_diff'] = rand(qs.new_diff[i])
-        else:
-            qs.at[i, "new_diff"] = qs.Difficulty[i]
-            qs.at[i, "new_diff"] = rand(qs.new_diff[i])
+    # forced pairs: Pairing values shared by exactly two questions, numbered in order of first appearance
+    codes, uniques = pd.factorize(qs["Pairing"])
+    sizes = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    forced = np.zeros(len(qs), dtype=bool)
+    forced[codes >= 0] = sizes[codes[codes >= 0]] == 2
+    pair_codes, pair_ids = np.unique(codes[forced], return_inverse=True)
+    qs.loc[forced, "pair_id"] = pair_ids
+    qs.loc[forced, "forced_pair"] = True
+    curr_id = len(pair_codes)
+
+    # pairs get the average of their difficulties; rand is still called once per question, in order, and a pair
+    # ends up with the value drawn for its last question
+    paired = qs.pair_id.to_numpy() != -1
+    average = qs.Difficulty.groupby(qs.pair_id).transform("mean")
+    base = qs.Difficulty.where(~paired, average)
+    new_diff = np.array([rand(d) for d in base])
+    rows = np.flatnonzero(paired)
+    last = np.zeros(curr_id, dtype=int)
+    np.maximum.at(last, pair_ids, rows)
+    new_diff[rows] = new_diff[last[pair_ids]]
+    qs["new_diff"] = new_diff
 
     ##    qs.insert(len(qs.columns), 'backup_diff', qs.new_diff)
 
     # looks at question quality
-    while np.count_nonzero(qs.round_number != -1) > 2 * target:
-        rem = [
-            np.count_nonzero(
-                np.logical_and(qs.round_number != -1, qs.is_bonus == i)
-            )  # number of questions remaining of specific type
-            for i in range(2)
-        ]
-        assert rem[0] >= target and rem[1] >= target
-        i = int(rem[1] > rem[0])
-        if rem[1 - i] > target:
-            candidates = (qs.round_number != -1) & (qs.is_bonus == i)
-            min_q = min(qs.Quality[candidates])
-            choice = np.random.choice(np.where(candidates & (qs.Quality == min_q))[0])
-            if qs.pair_id[choice] != -1:
-                qs.at[qs.pair_id == qs.pair_id[choice], "round_number"] = -1
-            else:
-                qs.at[choice, "round_number"] = -1
-        else:
-            candidates = (
-                (qs.round_number != -1) & (qs.is_bonus == i) & (qs.pair_id == -1)
-            )
-            min_q = min(qs.Quality[candidates])
-            choice = np.random.choice(np.where(candidates & (qs.Quality == min_q))[0])
-            qs.at[
-                choice, "round_number"
-            ] = -1  # sets round numbers to -1 for removed questions
+    drop_lowest_quality(qs, target)
 
     qs.sort_values("new_diff", inplace=True, ignore_index=True)
 
-    t = 0
-    b = 0
-    while t < len(qs) and b < len(qs):
-        if (qs.round_number[t] == -1) or (qs.is_bonus[t] != 0) or (qs.pair_id[t] != -1):
-            t += 1
-            continue
-        if (qs.round_number[b] == -1) or (qs.is_bonus[b] != 1) or (qs.pair_id[b] != -1):
-            b += 1
-            continue
-        qs.at[t, "pair_id"] = curr_id
-        qs.at[b, "pair_id"] = curr_id
-        # print(qs, t, b)
-        # print(qs.at[b, 'Question'])
-        new_difference = (qs.new_diff[t] + qs.new_diff[b]) / 2
-
-        qs.at[t, "new_diff"] = new_difference
-        qs.at[b, "new_diff"] = new_difference
-        curr_id += 1
+    # pairs the remaining unpaired toss-ups and bonuses in order of difficulty (the i-th toss-up with the i-th bonus),
+    # giving each pair the average of their difficulties
+    free = (qs.round_number.to_numpy() != -1) & (qs.pair_id.to_numpy() == -1)
+    is_bonus = qs.is_bonus.to_numpy().astype(bool)
+    t = np.flatnonzero(free & ~is_bonus)
+    b = np.flatnonzero(free & is_bonus)
+    num_pairs = min(len(t), len(b))
+    t, b = t[:num_pairs], b[:num_pairs]
+    pair_id = qs.pair_id.to_numpy(copy=True)
+    pair_id[t] = pair_id[b] = curr_id + np.arange(num_pairs)
+    new_diff = qs.new_diff.to_numpy(dtype=float, copy=True)
+    new_diff[t] = new_diff[b] = (new_diff[t] + new_diff[b]) / 2
+    qs["pair_id"] = pair_id
+    qs["new_diff"] = new_diff
+    curr_id += num_pairs
 
     ##    for i in range(len(qs)):
     ##        if qs.pair_id[i] != -1:
@@ -191,10 +168,11 @@ def assign(qs, rand=(lambda d: d)):  # rand: perturbation function
 
     ##    qs.insert(len(qs.columns), 'packet_order', 1000)
     ##
-    for i in range(num_rounds):
-        for j in range(i * per_round * 2, (i + 1) * per_round * 2):
-            qs.at[j, "round_number"] = i + 1
-        # qs.at[i*per_round*2:(i+1)*per_round*2-1, 'round_number'] = i+1
+    # the first per_round pairs go to round 1, the next to round 2, ...
+    kept = min(len(qs), num_rounds * per_round * 2)
+    round_number = qs.round_number.to_numpy(copy=True)
+    round_number[:kept] = np.arange(kept) // (per_round * 2) + 1
+    qs["round_number"] = round_number
 
     ##        for j in range(per_round):
     ##            qs.at[i*per_round*2+j*2:i*per_round*2+j*2+1,
@@ -209,26 +187,84 @@ def assign(qs, rand=(lambda d: d)):  # rand: perturbation function
     return qs
 
 
+class QualityPool:
+    # remaining questions of one kind, bucketed by quality; each bucket is a sorted list of row numbers, and a heap of
+    # qualities (with empty buckets left in until they reach the top) gives the lowest one
+    def __init__(self, quality, rows):
+        self.quality = quality
+        self.buckets = {}
+        for r in rows:
+            self.buckets.setdefault(quality[r], []).append(r)
+        self.heap = list(self.buckets)
+        heapq.heapify(self.heap)
+
+    def lowest(self):  # sorted rows with the lowest quality
+        while not self.buckets[self.heap[0]]:
+            del self.buckets[heapq.heappop(self.heap)]
+        return self.buckets[self.heap[0]]
+
+    def remove(self, row):
+        bucket = self.buckets[self.quality[row]]
+        del bucket[bisect_left(bucket, row)]
+
+
+def drop_lowest_quality(qs, target):
+    # removes questions (setting their round number to -1) until there are 2 * target left, taking the lowest-quality
+    # question of whichever type has more left (ties picked with np.random.choice, in row order, as the selection loop
+    # always has). forced pairs go together, and only unpaired questions are taken once the other type is down to target.
+    # questions without a quality are never picked
+    quality = qs.Quality.to_numpy()
+    is_bonus = qs.is_bonus.to_numpy().astype(int)
+    pair_id = qs.pair_id.to_numpy()
+    round_number = qs.round_number.to_numpy(copy=True)
+    remaining = round_number != -1
+    has_quality = remaining & pd.notna(quality)
+    pools = [
+        [
+            QualityPool(quality, np.flatnonzero(has_quality & (is_bonus == i))),
+            QualityPool(quality, np.flatnonzero(has_quality & (is_bonus == i) & (pair_id == -1))),
+        ]
+        for i in range(2)
+    ]
+    pair_rows = {}
+    for r in np.flatnonzero(pair_id != -1):
+        pair_rows.setdefault(pair_id[r], []).append(r)
+    rem = [np.count_nonzero(remaining & (is_bonus == i)) for i in range(2)]
+    while rem[0] + rem[1] > 2 * target:
+        assert rem[0] >= target and rem[1] >= target
+        i = int(rem[1] > rem[0])
+        tied = pools[i][0 if rem[1 - i] > target else 1].lowest()
+        choice = tied[np.random.choice(len(tied))]
+        for r in pair_rows[pair_id[choice]] if pair_id[choice] != -1 else [choice]:
+            round_number[r] = -1  # sets round numbers to -1 for removed questions
+            rem[is_bonus[r]] -= 1
+            if has_quality[r]:
+                pools[is_bonus[r]][0].remove(r)
+                if pair_id[r] == -1:
+                    pools[is_bonus[r]][1].remove(r)
+    qs["round_number"] = round_number
+
+
 def set_packet_order(qs, per_round):
     if "packet_order" in qs.columns:
-        qs.packet_order = 1000
+        qs.packet_order = 1000.0
     else:
-        qs.insert(len(qs.columns), "packet_order", 1000)
+        qs.insert(len(qs.columns), "packet_order", 1000.0)
+    rounds = qs["Round"]
     for i in range(num_rounds):
-        assert all(
-            qs.loc[i * per_round * 2 : (i + 1) * per_round * 2 - 1, "Round"] == i + 1
-        ), qs.Category[0]
-        for j in range(per_round):
-            val = 10 * i + j + np.random.uniform()
-            for k in range(i * per_round * 2 + j * 2, i * per_round * 2 + j * 2 + 2):
-                qs.at[k, "packet_order"] = val
-            # qs.at[i*per_round*2+j*2:i*per_round*2+j*2+1,
-            #'packet_order'] = 10*i+j+np.random.uniform()
+        assert all(rounds[i * per_round * 2 : (i + 1) * per_round * 2] == i + 1), qs.Category[0]
+    # pair j of round i gets 10 * i + j plus a random fraction, drawn in the same order as one draw per pair would be
+    kept = min(len(qs), num_rounds * per_round * 2)
+    slot = np.arange(num_rounds * per_round)
+    values = 10 * (slot // per_round) + slot % per_round + np.random.uniform(size=len(slot))
+    packet_order = qs.packet_order.to_numpy(dtype=float, copy=True)
+    packet_order[:kept] = np.repeat(values, 2)[:kept]
+    qs["packet_order"] = packet_order
     for i in range(num_tb):
-        row = np.where(qs.Round == i + 20)[0]
+        row = np.where(rounds == i + 20)[0]
         assert len(row) <= 1
         if len(row) == 1:
-            qs.at[row, "packet_order"] = 10 * (i + 20) + np.random.uniform()
+            qs.loc[row, "packet_order"] = 10 * (i + 20) + np.random.uniform()
 
 
 def interleave(qs_list):
@@ -242,26 +278,24 @@ def interleave(qs_list):
     return all_qs
 
 
+def question_rows(rnd):  # (type, category, format, question, answer) for each row, texified a column at a time
+    return zip(
+        rnd["Toss up/Bonus"],
+        rnd["Category"],
+        rnd["Type"],
+        texify_column(rnd["Question"]),
+        texify_column(rnd["Answer"]),
+    )
+
+
 def gen_tex(rnd, round_number):
     out = []
-    i = 0
-    for _, row in rnd.iterrows():
+    for i, row in enumerate(question_rows(rnd)):
         if i % 2 == 0:
             out.append("\\filbreak")
-        out.append(
-            "\\question{%s}{%s}{%s}{%s}{%s}{%s}\n"
-            % (
-                i // 2 + 1,
-                row["Toss up/Bonus"],
-                row["Category"],
-                row["Type"],
-                texify(row["Question"]),
-                texify(row["Answer"]),
-            )
-        )
+        out.append("\\question{%s}{%s}{%s}{%s}{%s}{%s}\n" % (i // 2 + 1, *row))
         if i % 2 == 1:
             out.append("\\hrulefill")
-        i += 1
     return ("\\newcommand{\\roundnumber}{%d}" % round_number) + (
         ROUND_TEMPLATE % "\n".join(out)
     )
@@ -269,23 +303,11 @@ def gen_tex(rnd, round_number):
 
 def gen_tex_tb(rnd, round_number):
     out = []
-    i = 0
-    for _, row in rnd.iterrows():
+    for i, row in enumerate(question_rows(rnd)):
         out.append("\\filbreak")
-        out.append(
-            "\\question{%s}{%s}{%s}{%s}{%s}{%s}\n"
-            % (
-                i + 1,
-                row["Toss up/Bonus"],
-                row["Category"],
-                row["Type"],
-                texify(row["Question"]),
-                texify(row["Answer"]),
-            )
-        )
+        out.append("\\question{%s}{%s}{%s}{%s}{%s}{%s}\n" % (i + 1, *row))
 
         out.append("\\hrulefill")
-        i += 1
 
     # if round_number == 5:
     #     print('\n'.join(out))
@@ -295,73 +317,74 @@ def gen_tex_tb(rnd, round_number):
     )
 
 
-with open("round_template_python.tex") as f:
-    ROUND_TEMPLATE = f.read()
+if __name__ == "__main__":
+    with open("round_template_python.tex") as f:
+        ROUND_TEMPLATE = f.read()
 
-with open("round_template_tb_python.tex") as f:
-    ROUND_TEMPLATE_TB = f.read()
+    with open("round_template_tb_python.tex") as f:
+        ROUND_TEMPLATE_TB = f.read()
 
-if not os.path.exists("splitrounds"):
-    os.mkdir("splitrounds")
+    if not os.path.exists("splitrounds"):
+        os.mkdir("splitrounds")
 
-if not os.path.exists("categories"):
-    os.mkdir("categories")
+    if not os.path.exists("categories"):
+        os.mkdir("categories")
 
-if len(sys.argv) == 1:
-    sys.argv += [f"categories/Prepacket - {c}.csv" for c in categories]
-    # sys.argv += ['Combined questions raw - Sheet1.csv']
+    if len(sys.argv) == 1:
+        sys.argv += [f"categories/Prepacket - {c}.csv" for c in categories]
+        # sys.argv += ['Combined questions raw - Sheet1.csv']
 
-if len(sys.argv) <= 6:
-    fname = sys.argv[1]
-    all_qs = pd.read_csv(fname)
-    if "Round" not in all_qs.columns:
-        qs_list = get_data(fname)
-        for i in range(len(categories)):
-            qs_list[i] = assign(qs_list[i])
-            # qs_list[i] = assign(qs_list[i], rand)
-            qs_list[i].to_csv("categories/" + categories[i] + ".csv", index=False)
+    if len(sys.argv) <= 6:
+        fname = sys.argv[1]
+        all_qs = pd.read_csv(fname)
+        if "Round" not in all_qs.columns:
+            qs_list = get_data(fname)
+            for i in range(len(categories)):
+                qs_list[i] = assign(qs_list[i])
+                # qs_list[i] = assign(qs_list[i], rand)
+                qs_list[i].to_csv("categories/" + categories[i] + ".csv", index=False)
+            all_qs = interleave(qs_list)
+            all_qs.to_csv("All.csv", index=False)
+    else:
+        qs_list = [pd.read_csv(fname) for fname in sys.argv[1:]]
+        for i in range(6):
+            set_packet_order(qs_list[i], category_targets[i])
         all_qs = interleave(qs_list)
         all_qs.to_csv("All.csv", index=False)
-else:
-    qs_list = [pd.read_csv(fname) for fname in sys.argv[1:]]
-    for i in range(6):
-        set_packet_order(qs_list[i], category_targets[i])
-    all_qs = interleave(qs_list)
-    all_qs.to_csv("All.csv", index=False)
-
-rounds = [all_qs[all_qs.Round == i + 1] for i in range(num_rounds)]
-for i in range(num_rounds):
-    rounds[i].drop(columns=["Round"], inplace=True)
-    rounds[i].to_csv(f"splitrounds/round{i+1}.csv", index=False)
-    with open(f"splitrounds/round{i+1}.tex", "w") as round_writer:
-        round_writer.write(gen_tex(rounds[i], i + 1))
-
-# tb_rounds = [all_qs[all_qs.Round == i+20] for i in range(num_rounds)]
-tb_rounds = [all_qs[all_qs.Round == i + 20] for i in range(1, num_tb + 1)]
-for i in range(num_tb):
-    tb_rounds[i].drop(columns=["Round"], inplace=True)
-    rounds[i].to_csv(f"splitrounds/tbround{i+1}.csv", index=False)
-    with open(f"splitrounds/tbround{i+1}.tex", "w") as round_writer:
-        round_writer.write(gen_tex_tb(tb_rounds[i], i + 1))
-
-# rounds = [all_qs[all_qs.Round == i+1] for i in range(num_rounds)]
-# for i in range(num_rounds):
-#     rounds[i].drop(columns=['Round'], inplace=True)
-#     rounds[i] = rounds[i].applymap(lambda s: '{{{}}}'.format(s))
-# ##    rounds[i].to_csv(f'splitrounds/round{i+1}.csv', index=False,
-# ##                     quoting=csv.QUOTE_NONE)
-#     with open('splitrounds/round{}.csv'.format(i+1), 'w') as round_writer:
-#         round_writer.write(','.join(rounds[i].columns) + '\n')
-#         for _, row in rounds[i].iterrows():
-#             round_writer.write(','.join(row) + '\n')
-#
-# tb_rounds = [all_qs[all_qs.Round == i+20] for i in range(num_rounds)]
-# for i in range(num_tb):
-#     tb_rounds[i].drop(columns=['Round'], inplace=True)
-#     tb_rounds[i] = tb_rounds[i].applymap(lambda s: '{{{}}}'.format(s))
-# ##    rounds[i].to_csv(f'splitrounds/round{i+1}.csv', index=False,
-# ##                     quoting=csv.QUOTE_NONE)
-#     with open('tiebreaks/tbround{}.csv'.format(i+1), 'w') as round_writer:
-#         round_writer.write(','.join(tb_rounds[i].columns) + '\n')
-#         for _, row in tb_rounds[i].iterrows():
-#             round_writer.write(','.join(row) + '\n')
+
+    rounds = [all_qs[all_qs.Round == i + 1] for i in range(num_rounds)]
+    for i in range(num_rounds):
+        rounds[i].drop(columns=["Round"], inplace=True)
+        rounds[i].to_csv(f"splitrounds/round{i+1}.csv", index=False)
+        with open(f"splitrounds/round{i+1}.tex", "w") as round_writer:
+            round_writer.write(gen_tex(rounds[i], i + 1))
+
+    # tb_rounds = [all_qs[all_qs.Round == i+20] for i in range(num_rounds)]
+    tb_rounds = [all_qs[all_qs.Round == i + 20] for i in range(1, num_tb + 1)]
+    for i in range(num_tb):
+        tb_rounds[i].drop(columns=["Round"], inplace=True)
+        rounds[i].to_csv(f"splitrounds/tbround{i+1}.csv", index=False)
+        with open(f"splitrounds/tbround{i+1}.tex", "w") as round_writer:
+            round_writer.write(gen_tex_tb(tb_rounds[i], i + 1))
+
+    # rounds = [all_qs[all_qs.Round == i+1] for i in range(num_rounds)]
+    # for i in range(num_rounds):
+    #     rounds[i].drop(columns=['Round'], inplace=True)
+    #     rounds[i] = rounds[i].applymap(lambda s: '{{{}}}'.format(s))
+    # ##    rounds[i].to_csv(f'splitrounds/round{i+1}.csv', index=False,
+    # ##                     quoting=csv.QUOTE_NONE)
+    #     with open('splitrounds/round{}.csv'.format(i+1), 'w') as round_writer:
+    #         round_writer.write(','.join(rounds[i].columns) + '\n')
+    #         for _, row in rounds[i].iterrows():
+    #             round_writer.write(','.join(row) + '\n')
+    #
+    # tb_rounds = [all_qs[all_qs.Round == i+20] for i in range(num_rounds)]
+    # for i in range(num_tb):
+    #     tb_rounds[i].drop(columns=['Round'], inplace=True)
+    #     tb_rounds[i] = tb_rounds[i].applymap(lambda s: '{{{}}}'.format(s))
+    # ##    rounds[i].to_csv(f'splitrounds/round{i+1}.csv', index=False,
+    # ##                     quoting=csv.QUOTE_NONE)
+    #     with open('tiebreaks/tbround{}.csv'.format(i+1), 'w') as round_writer:
+    #         round_writer.write(','.join(tb_rounds[i].columns) + '\n')
+    #         for _, row in tb_rounds[i].iterrows():
+    #             round_writer.write(','.join(row) + '\n')
@@ -0,0 +1,79 @@
+# Timings and counters for the --stats and --profile options of gen_packets.py and find_sheet_issues.py
+
+import contextlib
+import cProfile
+import json
+import sys
+import time
+
+
+class Stats:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages = {}  # Stage name -> seconds
+        self.counts = {}  # Counter name -> count
+        self.rounds = {}  # Round number -> the as_dict() of that round's Stats
+        self.round_stages = {}  # Stage name -> seconds, summed over rounds
+        self.warnings = []  # Messages for the user, such as questions left out of a round
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def count(self, name, n=1):
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def warn(self, message):
+        self.warnings.append(message)
+
+    # Records the stats of a single round (which may have been built in another process).
+    # Its stage times are added up in round_stages, and its counts and warnings are added to ours.
+    def add_round(self, round_num, round_stats):
+        self.rounds[round_num] = round_stats
+        for name, seconds in round_stats["stages"].items():
+            self.round_stages[name] = self.round_stages.get(name, 0.0) + seconds
+        for name, n in round_stats["counts"].items():
+            self.count(name, n)
+        for warning in round_stats.get("warnings", []):
+            self.warn(f"Round {round_num}: {warning}")
+
+    def as_dict(self):
+        result = {
+            "wall_time": time.perf_counter() - self.start,
+            "stages": self.stages,
+            "counts": self.counts,
+        }
+        if self.warnings:
+            result["warnings"] = self.warnings
+        if self.rounds:
+            result["round_stages"] = self.round_stages
+            result["rounds"] = {str(k): v for k, v in sorted(self.rounds.items())}
+        return result
+
+    # Writes the stats as JSON to path, or to stderr if path is "-"
+    def write(self, path):
+        text = json.dumps(self.as_dict(), indent=2)
+        if path == "-":
+            print(text, file=sys.stderr)
+        else:
+            with open(path, "w") as outf:
+                outf.write(text + "\n")
+
+
+# Runs the body under cProfile and dumps the profile to path (for pstats or snakeviz). Does nothing if path is None.
+@contextlib.contextmanager
+def profiled(path):
+    if path is None:
+        yield
+        return
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        profile.dump_stats(path)
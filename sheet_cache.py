@@ -0,0 +1,106 @@
+# On-disk cache of parsed sheets, shared by gen_packets.py and find_sheet_issues.py.
+# An entry is the pickled result of parsing a sheet (for gen_packets, the DataFrame with its rounds assigned), keyed
+# by the SHA-256 of the .csv's contents and of the settings it was parsed with, under a version string that changes
+# whenever the code that produced it does. A repeated run on an unchanged sheet then only hashes the file and unpickles
+# the entry, instead of parsing it. Entries for different settings (such as batch jobs with different numbers of rounds)
+# live side by side; only a new version of the code makes the old entries useless.
+
+import hashlib
+import os
+import pickle
+import sys
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".sheet_cache")
+MAX_ENTRIES = 8  # Least recently used entries beyond this are deleted
+SUFFIX = ".pickle"
+
+
+def file_digest(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as inf:
+        for chunk in iter(lambda: inf.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Digest of a .csv, or of a list of them (along with their names, which can matter to how they are parsed)
+def sheet_digest(path):
+    if isinstance(path, str):
+        return file_digest(path)
+    digest = hashlib.sha256()
+    for p in path:
+        digest.update(f"{os.path.basename(p)}\0{file_digest(p)}\0".encode())
+    return digest.hexdigest()
+
+
+# Hash of the code that parses the sheet (such as a hash of its source and library versions), along with the Python
+# version, since pickles aren't guaranteed to load across versions
+def code_version(*versions):
+    digest = hashlib.sha256(sys.version.encode())
+    for version in versions:
+        digest.update(b"\0" + str(version).encode())
+    return digest.hexdigest()[:16]
+
+
+# Digest of a sheet (as in sheet_digest) together with the settings it is parsed with
+def entry_digest(path, settings=()):
+    digest = hashlib.sha256(sheet_digest(path).encode())
+    for setting in settings:
+        digest.update(b"\0" + str(setting).encode())
+    return digest.hexdigest()
+
+
+def entry_path(directory, kind, version, digest):
+    return os.path.join(directory, f"{kind}-{version}-{digest}{SUFFIX}")
+
+
+# Deletes entries of the same kind made by another version of the code, then the least recently used entries beyond
+# max_entries
+def evict(directory, kind, version, max_entries=MAX_ENTRIES):
+    entries = []
+    for name in os.listdir(directory):
+        parts = name[: -len(SUFFIX)].rsplit("-", 2)
+        if not name.endswith(SUFFIX) or len(parts) != 3:
+            continue
+        path = os.path.join(directory, name)
+        entry_kind, entry_version, _ = parts
+        try:
+            if entry_kind == kind and entry_version != version:
+                os.remove(path)
+            else:
+                entries.append((os.stat(path).st_mtime_ns, path))
+        except FileNotFoundError:  # Another process evicted it first
+            pass
+    entries.sort(reverse=True)
+    for _, path in entries[max_entries:]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+# Returns (load(path), whether it came from the cache), where path is a .csv or a list of them. kind names what load
+# produces ("gen_packets" and "find_sheet_issues" parse sheets differently), version should come from code_version, and
+# settings lists anything else that changes what load returns.
+# An entry that can't be read (half-written, or pickled by incompatible code) is treated as missing and replaced.
+def load_cached(path, load, kind, version, settings=(), directory=CACHE_DIR, max_entries=MAX_ENTRIES):
+    entry = entry_path(directory, kind, version, entry_digest(path, settings))
+    try:
+        with open(entry, "rb") as inf:
+            value = pickle.load(inf)
+    except FileNotFoundError:
+        pass
+    except Exception:
+        print(f"Ignoring unreadable sheet cache entry {entry}", file=sys.stderr)
+    else:
+        os.utime(entry)  # Marks it as recently used
+        return value, True
+    value = load(path)
+    os.makedirs(directory, exist_ok=True)
+    # Written under a temporary name first, so that another process never reads a partial entry
+    temp = f"{entry}.{os.getpid()}.tmp"
+    with open(temp, "wb") as outf:
+        pickle.dump(value, outf, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp, entry)
+    evict(directory, kind, version, max_entries)
+    return value, False
@@ -0,0 +1,22 @@
+# What gen_packets.py and find_sheet_issues.py both need to know about the cells of a question sheet, so that reading a
+# sheet with the csv module (their fast and streaming paths) gives the same values as reading it with pandas.
+
+# Cells that pandas.read_csv reads as NaN by default
+NA_VALUES = frozenset(
+    {
+        "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+        "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+    }
+)
+
+# Empty cells all share this NaN, so that rows read twice from the same file compare equal
+NAN = float("nan")
+
+# Columns whose cells go into the .tex files, so their LaTeX has to compile
+LATEX_COLUMNS = ["Question", "W", "X", "Y", "Z", "Answer", "Accept", "Do Not Accept"]
+
+
+# A row from csv.DictReader with the cells pandas would read as NaN replaced by NAN. Cells csv.DictReader fills in
+# itself (None for a short row, a list of the extra values for a long one) are left as they are.
+def clean_cells(row):
+    return {k: NAN if type(v) is str and v in NA_VALUES else v for k, v in row.items()}
@@ -0,0 +1,12 @@
+import compile_rounds
+
+
+def test_compile_rounds_in_round_order(tmp_path):
+    for name in ("Round 10.tex", "Round 2.tex", "Round 1.tex", "Round TB.tex"):
+        (tmp_path / name).write_text("")
+    results = compile_rounds.compile_rounds(str(tmp_path), compiler="true")
+    assert [r.tex for r in results] == ["Round 1.tex", "Round 2.tex", "Round 10.tex", "Round TB.tex"]
+    assert all(r.status == compile_rounds.COMPILED for r in results)
+    (tmp_path / "Round 1.pdf").write_text("")
+    results = compile_rounds.compile_rounds(str(tmp_path), compiler="true")
+    assert [r.status for r in results][0] == compile_rounds.SKIPPED
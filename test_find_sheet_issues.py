@@ -0,0 +1,51 @@
+import io
+
+import find_sheet_issues as fsi
+
+HEADER = "Round,Type,Category,Format,Question,W,X,Y,Z,Answer,Accept,Do Not Accept\n"
+SHEET = HEADER + (
+    "1,Toss-up,Math,Short Answer,,,,,,4,,\n"
+    "1,Bonus,Math,Multiple Choice,,a,b,c,d,W,,\n"
+    "1,Toss-up,Biology,Short Answer,What is not a cell?,,,,,virus,,\n"
+    ",Bonus,Energy,Short Answer,NA,,,,,,,\n"
+)
+
+
+def stream_issues(text):
+    out = io.StringIO()
+    fsi.stream_error_file(io.StringIO(text), out)
+    return out.getvalue().splitlines()
+
+
+def column_issues(text):
+    fsi.import_pandas()
+    out = io.StringIO()
+    fsi.make_error_file(fsi.pd.read_csv(io.StringIO(text)), out)
+    return out.getvalue().splitlines()
+
+
+def test_stream_mode_reports_blank_questions():
+    assert stream_issues(SHEET) == [
+        "Warning on row 3: Multiple choice question does not contain the phrase 'which of the following'",
+        "Warning on row 4: Question does not capitalize the word 'not'",
+    ]
+
+
+def test_stream_mode_matches_column_mode():
+    assert sorted(stream_issues(SHEET)) == sorted(column_issues(SHEET))
+
+
+def test_both_modes_report_every_rule_a_row_breaks():
+    sheet = HEADER + (
+        "1,Toss-up,Math,Short Answer,Which is false or cannot be?,,,,,1,,\n"
+        "1,Tossup,Physics,Multiple Choice,Which is not true?,a,,c,d,W,,\n"
+    )
+    assert stream_issues(sheet) == column_issues(sheet) == [
+        "Warning on row 2: Question wording contains the word false",
+        "Warning on row 2: Question wording contains the word cannot",
+        "Warning on row 2: Question does not capitalize the word 'not'",
+        "Error on row 3: Question type invalid",
+        "Error on row 3: Multiple choice question has missing answer choices",
+        "Warning on row 3: Multiple choice question does not contain the phrase 'which of the following'",
+        "Warning on row 3: Question does not capitalize the word 'not'",
+    ]
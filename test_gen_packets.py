@@ -0,0 +1,182 @@
+import itertools
+import random
+
+import numpy as np
+import pytest
+
+import gen_packets as gp
+
+CATEGORIES = [gp.Category.Math, gp.Category.Biology, gp.Category.Chemistry]
+
+
+def question(category, subcat=None, difficulty=None, quality=None):
+    return gp.Question(category, subcat, "body", "ans", None, None, difficulty=difficulty, quality=quality)
+
+
+def pair(category):
+    return gp.QuestionPair(question(category), question(category))
+
+
+# Whether some order of the pairs inside each chunk has no two consecutive pairs of the same category across chunks
+def brute_force_orderable(chunks):
+    return any(
+        not gp.has_repeat_cat(list(orders)) for orders in itertools.product(*(itertools.permutations(c) for c in chunks))
+    )
+
+
+def test_order_chunks_matches_brute_force():
+    rng = random.Random(0)
+    for _ in range(300):
+        chunks = [
+            [pair(rng.choice(CATEGORIES)) for _ in range(rng.randint(1, 3))] for _ in range(rng.randint(1, 4))
+        ]
+        if brute_force_orderable(chunks):
+            ordered = gp.order_chunks(chunks, random.Random(1))
+            assert not gp.has_repeat_cat(ordered)
+            assert [sorted(map(id, c)) for c in ordered] == [sorted(map(id, c)) for c in chunks]
+        else:
+            with pytest.raises(ValueError):
+                gp.order_chunks(chunks, random.Random(1))
+
+
+def test_order_chunks_is_reproducible():
+    chunks = [[pair(c) for c in CATEGORIES] for _ in range(3)]
+    first = gp.order_chunks(chunks, random.Random(5))
+    second = gp.order_chunks(chunks, random.Random(5))
+    assert [list(map(id, c)) for c in first] == [list(map(id, c)) for c in second]
+
+
+def test_order_chunks_raises_without_valid_order():
+    chunks = [[pair(gp.Category.Math)], [pair(gp.Category.Math), pair(gp.Category.Math)]]
+    with pytest.raises(ValueError, match="No ordering without repeated categories"):
+        gp.order_chunks(chunks, random.Random(0))
+
+
+def test_min_cost_assignment_matches_brute_force():
+    gp.import_pandas()
+    rng = np.random.default_rng(0)
+    for n in range(1, 7):
+        for _ in range(20):
+            cost = rng.integers(0, 10, size=(n, n)).astype(float)
+            assigned = gp.min_cost_assignment(cost)
+            assert sorted(assigned) == list(range(n))
+            best = min(cost[range(n), list(p)].sum() for p in itertools.permutations(range(n)))
+            assert cost[range(n), assigned].sum() == pytest.approx(best)
+
+
+# Size of a maximum matching of toss-ups to bonuses that can be paired, by augmenting paths
+def max_matching(tossups, bonuses):
+    bonus_of = {}
+
+    def augment(t, seen):
+        for b, bonus in enumerate(bonuses):
+            if b not in seen and gp.can_pair(tossups[t], bonus):
+                seen.add(b)
+                if b not in bonus_of or augment(bonus_of[b], seen):
+                    bonus_of[b] = t
+                    return True
+        return False
+
+    return sum(augment(t, set()) for t in range(len(tossups)))
+
+
+def energy_questions(rng, subcats):
+    return [
+        question(gp.Category.Energy, rng.choice(subcats), rng.randint(1, 5), rng.randint(1, 5))
+        for _ in range(rng.randint(0, 7))
+    ]
+
+
+def test_energy_pairing_matches_maximum_matching():
+    rng = random.Random(0)
+    for _ in range(500):
+        tossups = energy_questions(rng, ["Nuclear", "Solar", "Grid", None])
+        bonuses = energy_questions(rng, ["Nuclear", "Solar", "Grid"])
+        pairs, unmatched = gp.pair_category(gp.Category.Energy, tossups, bonuses)
+        assert len(pairs) == max_matching(tossups, bonuses)
+        assert all(gp.can_pair(p.tossup, p.bonus) for p in pairs)
+        used = [id(p.tossup) for p in pairs] + [id(p.bonus) for p in pairs] + [id(q) for _, q in unmatched]
+        assert sorted(used) == sorted(map(id, tossups + bonuses))
+        limit = rng.randint(0, 4)
+        pairs, _ = gp.pair_category(gp.Category.Energy, tossups, bonuses, limit)
+        assert len(pairs) == min(limit, max_matching(tossups, bonuses))
+
+
+def test_pair_subcats_pairs_every_question_when_possible():
+    rng = random.Random(1)
+    for _ in range(500):
+        n = rng.randint(1, 6)
+        tossups = [question(gp.Category.Energy, rng.choice("ABC")) for _ in range(n)]
+        bonuses = [question(gp.Category.Energy, rng.choice("ABC")) for _ in range(n)]
+        if max_matching(tossups, bonuses) < n:
+            continue
+        pairs = gp.pair_subcats(tossups, bonuses)
+        assert [id(p.tossup) for p in pairs] == list(map(id, tossups))
+        assert sorted(id(p.bonus) for p in pairs) == sorted(map(id, bonuses))
+
+
+def item_block(*items):
+    return gp.make_item_block(list(items))
+
+
+@pytest.mark.parametrize(
+    "body, expected",
+    [
+        ("Name: 1) a; 2) b; 3) c", "Name:\n" + item_block("a", "b", "c")),
+        ("Order 1) w 2) x 3) y 4) z", "Order\n" + item_block("w", "x", "y", "z")),
+        ("Pick 1) a; 2) b 3) c", "Pick\n" + item_block("a;", "b", "c")),
+        ("First line\nWhich: 1) x; 2) y\nLast line", "First line\nWhich:\n" + item_block("x", "y") + "\nLast line"),
+        ("No items here", None),
+        ("Only 1) one item", None),
+    ],
+)
+def test_render_mult_item(body, expected):
+    assert gp.render_mult_item(body) == expected
+
+
+def test_engines_split_rounds_the_same_way(tmp_path):
+    path = tmp_path / "sheet.csv"
+    path.write_text("Round,Question\n1,a\nTB,b\n 2 ,c\n2.0,d\n1e0,e\n,f\n1_0,g\n")
+    stats = gp.Stats()
+    rounds = {}
+    gp.import_pandas()
+    for engine in ("stdlib", "pandas"):
+        sheet = gp.read_rows(path) if engine == "stdlib" else gp.pd.read_csv(path)
+        gp.coerce_round_numbers(sheet, stats)
+        rounds[engine] = {
+            round_num: list(qs[gp.BODY]) if engine == "pandas" else [row[gp.BODY] for row in qs]
+            for round_num, qs in gp.iter_rounds(sheet, 3)
+        }
+    assert rounds["stdlib"] == rounds["pandas"] == {1: ["a", "e"], 2: ["c", "d"], 3: []}
+    assert stats.warnings == ["2 rows have a Round that isn't a number, so they are in no round (row 3: TB; row 8: 1_0)"] * 2
+
+
+def test_read_jobs_paths(tmp_path):
+    batch = tmp_path / "sub" / "jobs.json"
+    batch.parent.mkdir()
+    batch.write_text('[{"sheet": "a.csv", "output": "a-tex"}, {"sheet": "b.csv"}]')
+    args = gp.parse_args(["--batch", str(batch), "--template", "my.tex", "-o", "out"])
+    first, second = gp.read_jobs(str(batch), args)
+    assert first.output == str(batch.parent / "a-tex")
+    assert second.output == "out"
+    assert first.template == second.template == "my.tex"
+    assert second.sheet == str(batch.parent / "b.csv")
+
+
+def test_read_jobs_rejects_shared_outputs(tmp_path):
+    batch = tmp_path / "jobs.json"
+    batch.write_text('[{"sheet": "a.csv"}, {"sheet": "b.csv"}]')
+    with pytest.raises(ValueError, match="Jobs 1 and 2"):
+        gp.read_jobs(str(batch), gp.parse_args(["--batch", str(batch)]))
+
+
+def test_main_reports_broken_latex_without_traceback(tmp_path, capsys):
+    sheet = tmp_path / "sheet.csv"
+    sheet.write_text(
+        "Round,Type,Category,Format,Subcategory,Question,W,X,Y,Z,Answer,Accept,Do Not Accept\n"
+        "1,Toss-up,Math,Short Answer,,What is $x,,,,,1,,\n"
+    )
+    with pytest.raises(SystemExit) as exit_info:
+        gp.main([str(sheet), "--output", str(tmp_path / "out")])
+    assert exit_info.value.code == 1
+    assert capsys.readouterr().err.startswith("Error: 1 cells have broken LaTeX (row 2, Question:")
@@ -0,0 +1,46 @@
+import pytest
+
+import latex_lint
+
+COMMANDS = latex_lint.known_commands()
+
+
+@pytest.mark.parametrize(
+    "text, problem",
+    [
+        ("$x^2$", None),
+        ("\\(a_1\\) and \\[b\\]", None),
+        ("\\ce{H2O^+} and $x_{\\text{max}}$", None),
+        ("\\text{a_b}", "_ outside math mode"),
+        ("a \\& b, 50\\% off", None),
+        ("$\\begin{pmatrix} 1 & 2 \\end{pmatrix}$", None),
+        ("x^2", "^ outside math mode"),
+        ("\\frac{1}{2}", "\\frac outside math mode"),
+        ("{a", "{ is never closed"),
+        ("a}", "unmatched }"),
+        ("$a", "$...$ math is never closed"),
+        ("$$a$", "$$ closed with $"),
+        ("50% off", "unescaped %"),
+        ("a & b", "unescaped &"),
+        ("\\(a\\]", "\\] without a matching \\["),
+        ("\\begin{itemize} x", "\\begin{itemize} is never closed"),
+        ("\\begin{pmatrix} 1 \\end{pmatrix}", "\\begin{pmatrix} outside math mode"),
+    ],
+)
+def test_check_latex_problems(text, problem):
+    assert latex_lint.check_latex(text, COMMANDS)[0] == problem
+
+
+def test_check_latex_unknown_commands():
+    assert latex_lint.check_latex("\\foo{x} \\textbf{y} \\foo $\\alpha$", COMMANDS) == (None, ["\\foo"])
+    assert latex_lint.check_latex("$\\foo$ {", COMMANDS) == ("{ is never closed", ["\\foo"])
+    assert latex_lint.check_latex(float("nan"), COMMANDS) == (None, [])
+
+
+def test_known_commands_include_template_commands():
+    assert {"wxyz", "roundnumber"} <= COMMANDS
+
+
+def test_check_cells():
+    cells = ["fine", "x^2", None, "\\foo"]
+    assert list(latex_lint.check_cells(cells, COMMANDS)) == [(1, "^ outside math mode", []), (3, None, ["\\foo"])]